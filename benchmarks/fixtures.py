@@ -0,0 +1,64 @@
+"""
+Offline inputs for the benchmarks.
+
+Fixtures are generated from a seed, so every run measures the same data and
+benchmark runs never touch the network.
+"""
+
+import numpy as np
+import pandas as pd
+
+from financial_definitions import INCOME_STATEMENT_STRUCTURE, BALANCE_SHEET_STRUCTURE, CASH_FLOW_STRUCTURE
+
+STRUCTURES = {
+    "financials": INCOME_STATEMENT_STRUCTURE,
+    "balance_sheet": BALANCE_SHEET_STRUCTURE,
+    "cashflow": CASH_FLOW_STRUCTURE,
+}
+
+
+def price_history(n_bars: int, freq: str = "min", seed: int = 0) -> pd.DataFrame:
+    """
+    Random-walk OHLCV history shaped like yfinance output (tz-aware index,
+    Dividends and Stock Splits columns).
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2000-01-03 09:30", periods=n_bars, freq=freq, tz="America/New_York", name="Date")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 1e-3, n_bars)))
+    spread = np.abs(rng.normal(0, 5e-4, n_bars)) * close
+    return pd.DataFrame({
+        "Open": np.roll(close, 1),
+        "High": close + spread,
+        "Low": close - spread,
+        "Close": close,
+        "Volume": rng.integers(1_000, 1_000_000, n_bars).astype(float),
+        "Dividends": 0.0,
+        "Stock Splits": 0.0,
+    }, index=index)
+
+
+def close_matrix(n_days: int, n_tickers: int, seed: int = 0) -> pd.DataFrame:
+    """Date x Ticker close matrix (as indicator_engine.close_matrix returns)."""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2000-01-03", periods=n_days, name="Date")
+    values = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (n_days, n_tickers)), axis=0))
+    return pd.DataFrame(values, index=index, columns=[f"T{i:04d}" for i in range(n_tickers)])
+
+
+def statement(kind: str, n_periods: int = 4, seed: int = 0) -> pd.DataFrame:
+    """
+    Date-indexed statement (as StockDataLoader returns) with every line item of
+    the matching financial_definitions structure.
+    """
+    rng = np.random.default_rng(seed)
+    items = [m for _, metrics in STRUCTURES[kind] for m in metrics]
+    index = pd.DatetimeIndex(pd.date_range("2020-09-30", periods=n_periods, freq="12ME")[::-1], name="Date")
+    values = rng.uniform(1e8, 1e11, (n_periods, len(items)))
+    return pd.DataFrame(values, index=index, columns=items)
+
+
+def statement_panel(kind: str, n_tickers: int, n_periods: int = 4, seed: int = 0) -> pd.DataFrame:
+    """Statements stacked by (Ticker, Date), as fetch_statements_many returns."""
+    frames = {f"T{i:04d}": statement(kind, n_periods, seed + i) for i in range(n_tickers)}
+    return pd.concat(frames, names=["Ticker", "Date"])
+
@@ -0,0 +1,271 @@
+"""
+Benchmarks for the analysis and data-loading hot paths.
+
+Runs offline against the fixtures in fixtures.py and stores one JSON file per
+run in benchmarks/results/, named after the time and git commit, so a change
+can be compared with the run before it. The code being timed is checked for
+correctness by the pytest suite in tests/; this runner only measures it:
+
+    python benchmarks/run.py                     # quick suite, compared with the previous run
+    python benchmarks/run.py --suite full        # 1k-10M bars, 1-5,000 tickers
+    python benchmarks/run.py --filter dcf        # only benchmarks whose name contains 'dcf'
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "src"))
+# Keep the data layer's module-level caches away from the user's real cache
+os.environ.setdefault("VD_CACHE_DIR", tempfile.mkdtemp(prefix="vd-bench-cache-"))
+os.environ.setdefault("VD_ARCHIVE_DIR", tempfile.mkdtemp(prefix="vd-bench-archive-"))
+
+import numpy as np
+import pandas as pd
+
+import analysis
+import fixtures
+import indicator_engine
+from compact_history import CompactHistory
+from disk_cache import DiskCache
+from downsampling import lttb, ohlc_buckets
+from price_archive import PriceArchive
+from statement_views import build_statement_view
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+SUITES = {
+    "quick": {
+        "bars": [1_000, 100_000],
+        "tickers": [1, 100],
+        "grid": [10, 100],
+        "draws": [100_000],
+    },
+    "full": {
+        "bars": [1_000, 10_000, 100_000, 1_000_000, 10_000_000],
+        "tickers": [1, 10, 100, 1_000, 5_000],
+        "grid": [10, 100, 1_000],
+        "draws": [100_000, 1_000_000],
+    },
+}
+
+# (name, size kind or None, factory). A factory takes the size (if any), does the
+# setup outside the timed region and returns the zero-argument callable to time.
+BENCHMARKS = []
+
+
+def benchmark(name: str, sizes: str = None):
+    def register(factory):
+        BENCHMARKS.append((name, sizes, factory))
+        return factory
+    return register
+
+
+@benchmark("indicators.sma", "bars")
+def _sma(n):
+    data = fixtures.price_history(n)
+    return lambda: analysis.calculate_sma(data)
+
+
+@benchmark("indicators.ema", "bars")
+def _ema(n):
+    data = fixtures.price_history(n)
+    return lambda: analysis.calculate_ema(data)
+
+
+@benchmark("indicators.rsi", "bars")
+def _rsi(n):
+    data = fixtures.price_history(n)
+    return lambda: analysis.calculate_rsi(data)
+
+
+@benchmark("indicators.bollinger", "bars")
+def _bollinger(n):
+    data = fixtures.price_history(n)
+    return lambda: analysis.calculate_bollinger_bands(data)
+
+
+@benchmark("indicators.universe_10y", "tickers")
+def _universe(n):
+    closes = fixtures.close_matrix(2_520, n)
+    return lambda: indicator_engine.compute_indicators(closes)
+
+
+@benchmark("fundamentals.single")
+def _fundamentals():
+    fin, bs, cf = (fixtures.statement(kind) for kind in fixtures.STRUCTURES)
+    return lambda: analysis.calculate_fundamental_metrics(fin, bs, cf)
+
+
+@benchmark("fundamentals.panel", "tickers")
+def _fundamentals_panel(n):
+    fin, bs, cf = (fixtures.statement_panel(kind, n) for kind in fixtures.STRUCTURES)
+    return lambda: analysis.calculate_fundamental_metrics_panel(fin, bs, cf)
+
+
+@benchmark("dcf.scalar")
+def _dcf():
+    return lambda: analysis.calculate_dcf(1e9, 0.1, 0.025, 0.09, shares_outstanding=1e8, net_debt=2e9)
+
+
+@benchmark("dcf.sensitivity", "grid")
+def _dcf_grid(n):
+    growth = np.linspace(0.0, 0.3, n)
+    wacc = np.linspace(0.05, 0.2, n)
+    return lambda: analysis.dcf_sensitivity(1e9, growth, wacc, 0.025, shares_outstanding=1e8, net_debt=2e9)
+
+
+@benchmark("dcf.monte_carlo", "draws")
+def _dcf_mc(n):
+    return lambda: analysis.simulate_dcf(1e9, (0.1, 0.03), (0.025, 0.005), (0.09, 0.01), n_draws=n,
+                                         shares_outstanding=1e8, net_debt=2e9, seed=0)
+
+
+@benchmark("statements.build_views")
+def _statement_views():
+    frames = {kind: fixtures.statement(kind, n_periods=20) for kind in fixtures.STRUCTURES}
+    return lambda: [build_statement_view(frames[kind], fixtures.STRUCTURES[kind]) for kind in frames]
+
+
+@benchmark("data.compact_roundtrip", "bars")
+def _compact(n):
+    data = fixtures.price_history(n)
+    return lambda: CompactHistory.from_frame(data).to_frame()
+
+
+@benchmark("data.disk_cache_frame", "bars")
+def _disk_cache(n):
+    data = fixtures.price_history(n)
+    cache = DiskCache(root=tempfile.mkdtemp(prefix="vd-bench-"), max_bytes=2**40)
+
+    def run():
+        cache.set_frame("history_series", data, ticker="BENCH")
+        return cache.get_frame("history_series", ticker="BENCH")
+    return run
+
+
+@benchmark("data.archive_week_slice", "bars")
+def _archive(n):
+    data = fixtures.price_history(n)
+    archive = PriceArchive(root=tempfile.mkdtemp(prefix="vd-bench-"))
+    archive.append("BENCH", "1m", data)
+    middle = data.index[n // 2]
+    return lambda: archive.open("BENCH", "1m").slice(middle, middle + pd.Timedelta(days=7)).to_frame()
+
+
+@benchmark("charts.downsample", "bars")
+def _downsample(n):
+    data = fixtures.price_history(n)
+    sma = analysis.calculate_sma(data)
+    return lambda: (ohlc_buckets(data, 700), lttb(sma, 1400))
+
+
+def measure(func, repeat: int) -> dict:
+    """Best and median seconds per call, timeit-style (loops sized to ~0.2 s per sample)."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    samples = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {"best": min(samples), "median": float(np.median(samples)), "loops": number, "repeat": repeat}
+
+
+def _cases(suite: dict):
+    for name, sizes, factory in BENCHMARKS:
+        if sizes is None:
+            yield name, factory
+        else:
+            for n in suite[sizes]:
+                yield f"{name}[{n}]", lambda factory=factory, n=n: factory(n)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _previous_results() -> dict:
+    """Latest stored result per benchmark name: {name: (commit, result)}."""
+    if not os.path.isdir(RESULTS_DIR):
+        return {}
+    latest = {}
+    # File names start with the run time, so sorting orders them chronologically
+    for filename in sorted(f for f in os.listdir(RESULTS_DIR) if f.endswith(".json")):
+        with open(os.path.join(RESULTS_DIR, filename)) as f:
+            run = json.load(f)
+        for name, result in run["results"].items():
+            latest[name] = (run["commit"], result)
+    return latest
+
+
+def _format_seconds(t: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if t >= scale:
+            return f"{t / scale:8.2f} {unit}"
+    return f"{t / 1e-9:8.2f} ns"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", choices=sorted(SUITES), default="quick")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per benchmark")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Slowdown ratio vs. the previous run reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--no-save", action="store_true", help="Do not write a results file")
+    args = parser.parse_args(argv)
+
+    commit = _git_commit()
+    filename = f"{time.strftime('%Y%m%d-%H%M%S')}_{commit[:10]}.json"
+    previous = _previous_results()
+
+    results = {}
+    regressions = []
+    for name, setup in _cases(SUITES[args.suite]):
+        if args.filter not in name:
+            continue
+        result = measure(setup(), args.repeat)
+        results[name] = result
+        line = f"{name:45s} {_format_seconds(result['best'])}"
+        if name in previous:
+            before_commit, before = previous[name]
+            ratio = result["best"] / before["best"]
+            line += f"   {ratio:5.2f}x vs {before_commit[:10]}"
+            if ratio > args.threshold:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line, flush=True)
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        payload = {
+            "commit": commit,
+            "time": time.time(),
+            "suite": args.suite,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "results": results,
+        }
+        with open(os.path.join(RESULTS_DIR, filename), "w") as f:
+            json.dump(payload, f, indent=1, sort_keys=True)
+        print(f"Saved {os.path.join('benchmarks', 'results', filename)}")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold}x: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,20 @@
+import numpy as np
 import pandas as pd
 
+from instrumentation import timed
+from metric_resolver import column_resolver
+
+@timed
 def calculate_sma(data: pd.DataFrame, window: int = 20) -> pd.Series:
     """Calculates Simple Moving Average."""
     return data['Close'].rolling(window=window).mean()
 
+@timed
 def calculate_ema(data: pd.DataFrame, window: int = 20) -> pd.Series:
     """Calculates Exponential Moving Average."""
     return data['Close'].ewm(span=window, adjust=False).mean()
 
+@timed
 def calculate_rsi(data: pd.DataFrame, window: int = 14) -> pd.Series:
     """Calculates Relative Strength Index."""
     delta = data['Close'].diff()
@@ -18,74 +25,129 @@ def calculate_rsi(data: pd.DataFrame, window: int = 14) -> pd.Series:
     rsi = 100 - (100 / (1 + rs))
     return rsi
 
+@timed
 def calculate_bollinger_bands(data: pd.DataFrame, window: int = 20):
     """Calculates Bollinger Bands."""
-    sma = calculate_sma(data, window)
-    std = data['Close'].rolling(window=window).std()
+    rolling = data['Close'].rolling(window=window)
+    sma = rolling.mean()
+    std = rolling.std()
     upper_band = sma + (std * 2)
     lower_band = sma - (std * 2)
     return upper_band, lower_band
 
+@timed
 def calculate_fundamental_metrics(financials: pd.DataFrame, balance_sheet: pd.DataFrame, cashflow: pd.DataFrame) -> pd.DataFrame:
     """
     Calculates a comprehensive set of fundamental metrics from financial statements.
     Assumes inputs are Date-indexed (rows=dates, cols=metrics).
     """
-    metrics = pd.DataFrame(index=financials.index)
+    # Resolvers are built once per statement schema and cached across calls
+    def getter(df):
+        resolver = column_resolver(df.columns)
+
+        # Helper to safely get column (metric is a key of metric_resolver.METRIC_ALIASES)
+        def get_val(metric):
+            col = resolver.resolve(metric)
+            if col is not None:
+                return df[col]
+            return pd.Series(index=df.index, dtype=float) # Return NaNs if not found
+        return get_val
+
+    metrics = _fundamental_metrics(financials.index, getter(financials), getter(balance_sheet), getter(cashflow))
+
+    # Cleanup: Return Metrics as Rows, Dates as Columns
+    # Request: Invert X-axis (Oldest -> Newest) implies Ascending order of dates
+    return metrics.sort_index(ascending=True).T
+
+@timed
+def calculate_fundamental_metrics_panel(financials: pd.DataFrame, balance_sheet: pd.DataFrame, cashflow: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cross-sectional calculate_fundamental_metrics for a whole universe in one pass.
+
+    Inputs are stacked statements indexed by (Ticker, Date), as returned by
+    StockDataLoader.fetch_statements_many. Because the columns are the union over
+    all companies, a line item missing for one company falls back to the next
+    alias that company does report (e.g. 'Total Revenue' -> 'Revenue').
+
+    Returns:
+        Tidy DataFrame with columns Ticker, Date, Metric, Value.
+    """
+    def getter(df):
+        df = df.apply(pd.to_numeric, errors='coerce')
+        resolver = column_resolver(df.columns)
 
-    # Helper to safely get column
-    def get_val(df, keywords):
-        for k in keywords:
-            for c in df.columns:
-                if k.lower() == c.lower() or k.lower() in c.lower():
-                    return df[c]
-        return pd.Series(index=df.index, dtype=float) # Return NaNs if not found
+        def get_val(metric):
+            cols = resolver.candidates(metric)
+            if not cols:
+                return pd.Series(index=df.index, dtype=float)
+            values = df[cols[0]]
+            for c in cols[1:]:
+                values = values.fillna(df[c])
+            return values
+        return get_val
+
+    metrics = _fundamental_metrics(financials.index, getter(financials), getter(balance_sheet), getter(cashflow))
+    metrics.index = metrics.index.set_names(["Ticker", "Date"])
+    tidy = metrics.reset_index().melt(id_vars=["Ticker", "Date"], var_name="Metric", value_name="Value")
+    tidy = tidy.dropna(subset=["Value"])
+    return tidy.sort_values(["Ticker", "Date"], kind="stable").reset_index(drop=True)
+
+def _fundamental_metrics(index: pd.Index, get_fin, get_bs, get_cf) -> pd.DataFrame:
+    """
+    Metric formulas shared by the single-company and panel versions.
+
+    Args:
+        index: Row index of the result (the income statement's).
+        get_fin, get_bs, get_cf: Callables mapping a METRIC_ALIASES key to a Series
+            from the income statement, balance sheet and cash flow statement.
+    """
+    metrics = pd.DataFrame(index=index)
 
     # --- 1. Profitability Metrics ---
-    revenue = get_val(financials, ['Total Revenue', 'Revenue'])
-    net_income = get_val(financials, ['Net Income', 'Net Income Common Stockholders'])
-    gross_profit = get_val(financials, ['Gross Profit'])
-    op_income = get_val(financials, ['Operating Income'])
-    ebitda = get_val(financials, ['EBITDA', 'Normalized EBITDA'])
-    ebit = get_val(financials, ['EBIT'])
+    revenue = get_fin('revenue')
+    net_income = get_fin('net_income')
+    gross_profit = get_fin('gross_profit')
+    op_income = get_fin('operating_income')
+    ebitda = get_fin('ebitda')
+    ebit = get_fin('ebit')
     
     metrics['Gross Margin %'] = (gross_profit / revenue) * 100
     metrics['Operating Margin %'] = (op_income / revenue) * 100
     metrics['Net Margin %'] = (net_income / revenue) * 100
     metrics['EBITDA Margin %'] = (ebitda / revenue) * 100
     
-    stockholders_equity = get_val(balance_sheet, ['Stockholders Equity', 'Total Stockholder Equity'])
-    total_assets = get_val(balance_sheet, ['Total Assets'])
+    stockholders_equity = get_bs('stockholders_equity')
+    total_assets = get_bs('total_assets')
     
     metrics['ROE %'] = (net_income / stockholders_equity) * 100
     metrics['ROA %'] = (net_income / total_assets) * 100
 
     # --- 2. Liquidity & Health ---
-    current_assets = get_val(balance_sheet, ['Current Assets', 'Total Current Assets'])
-    current_liabilities = get_val(balance_sheet, ['Current Liabilities', 'Total Current Liabilities'])
-    inventory = get_val(balance_sheet, ['Inventory'])
+    current_assets = get_bs('current_assets')
+    current_liabilities = get_bs('current_liabilities')
+    inventory = get_bs('inventory')
     
     metrics['Current Ratio'] = current_assets / current_liabilities
     metrics['Quick Ratio'] = (current_assets - inventory) / current_liabilities
     
-    total_debt = get_val(balance_sheet, ['Total Debt'])
+    total_debt = get_bs('total_debt')
     metrics['Debt-to-Equity'] = total_debt / stockholders_equity
     metrics['Debt-to-Assets'] = total_debt / total_assets
     
-    interest_expense = get_val(financials, ['Interest Expense'])
+    interest_expense = get_fin('interest_expense')
     # Interest Coverage = EBIT / Interest Expense
     metrics['Interest Coverage'] = ebit / interest_expense
 
     # --- 3. Efficiency ---
     metrics['Asset Turnover'] = revenue / total_assets
     
-    receivables = get_val(balance_sheet, ['Receivables', 'Accounts Receivable'])
+    receivables = get_bs('receivables')
     # Receivables Turnover = Revenue / Receivables
     metrics['Receivables Turnover'] = revenue / receivables
 
     # --- 4. Cash Flow Metrics ---
-    op_cash_flow = get_val(cashflow, ['Operating Cash Flow', 'Total Cash From Operating Activities'])
-    capex = get_val(cashflow, ['Capital Expenditure'])
+    op_cash_flow = get_cf('operating_cash_flow')
+    capex = get_cf('capex')
     
     # Free Cash Flow = Operating Cash Flow + CapEx (assuming CapEx is typically negative)
     # metrics['Operating Cash Flow'] = op_cash_flow
@@ -95,16 +157,15 @@ def calculate_fundamental_metrics(financials: pd.DataFrame, balance_sheet: pd.Da
     metrics['FCF / Net Income'] = free_cash_flow / net_income
 
     # --- 5. Per Share Data ---
-    shares = get_val(financials, ['Diluted Average Shares', 'Basic Average Shares'])
-    metrics['EPS (Diluted)'] = get_val(financials, ['Diluted EPS'])
-    metrics['EPS (Basic)'] = get_val(financials, ['Basic EPS'])
+    shares = get_fin('shares')
+    metrics['EPS (Diluted)'] = get_fin('diluted_eps')
+    metrics['EPS (Basic)'] = get_fin('basic_eps')
     metrics['Book Value Per Share'] = stockholders_equity / shares
     metrics['FCF Per Share'] = free_cash_flow / shares
 
-    # Cleanup: Return Metrics as Rows, Dates as Columns
-    # Request: Invert X-axis (Oldest -> Newest) implies Ascending order of dates
-    return metrics.sort_index(ascending=True).T
+    return metrics
 
+@timed
 def calculate_dcf(
     free_cash_flow: float,
     growth_rate: float,
@@ -167,3 +228,224 @@ def calculate_dcf(
         "terminal_value": terminal_value,
         "pv_terminal_value": pv_terminal_value
     }
+
+
+@timed
+def dcf_inputs(balance_sheet: pd.DataFrame, cashflow: pd.DataFrame, info: dict) -> dict:
+    """
+    Extracts the DCF model inputs from the latest period of the statements.
+
+    Args:
+        balance_sheet: Date-indexed balance sheet (as returned by StockDataLoader).
+        cashflow: Date-indexed cash flow statement.
+        info: yfinance info dict (shares outstanding, current price).
+
+    Returns:
+        Dictionary with free_cash_flow, net_debt, shares_outstanding and current_price.
+    """
+    # Need standardized DF where cols are dates ascending
+    cfs_corr = cashflow.T.sort_index(axis=1, ascending=True).dropna(axis=1, how='all')
+    bs_corr = balance_sheet.T.sort_index(axis=1, ascending=True).dropna(axis=1, how='all')
+
+    # Latest Data
+    latest_cfs = cfs_corr.iloc[:, -1]
+    latest_bs = bs_corr.iloc[:, -1]
+
+    # FCF = Op Cash Flow + CapEx (negative)
+    ocf = latest_cfs.get("Total Cash From Operating Activities", latest_cfs.get("Operating Cash Flow", 0))
+    capex = latest_cfs.get("Capital Expenditure", 0)
+    fcf = ocf + capex
+
+    total_debt = latest_bs.get("Total Debt", 0)
+    cash = latest_bs.get("Cash And Cash Equivalents", 0) + latest_bs.get("Cash Cash Equivalents And Short Term Investments", 0)
+    # Avoid double counting if using composite key
+    if cash > latest_bs.get("Cash And Cash Equivalents", 0) * 1.5:
+        cash = latest_bs.get("Cash Cash Equivalents And Short Term Investments", 0) # Prioritize the aggregate
+
+    return {
+        "free_cash_flow": fcf,
+        "net_debt": total_debt - cash,
+        "shares_outstanding": info.get('sharesOutstanding', 1),
+        "current_price": info.get('currentPrice', 0),
+    }
+
+
+@timed
+def calculate_dcf_grid(
+    free_cash_flow,
+    growth_rate,
+    terminal_growth_rate,
+    discount_rate,
+    years: int = 5,
+    shares_outstanding=1,
+    net_debt=0,
+    growth_path=None
+) -> dict:
+    """
+    Vectorized calculate_dcf: evaluates many assumption sets at once.
+
+    All inputs are broadcast together with NumPy rules, so e.g. a column of
+    discount rates against a row of growth rates yields a full sensitivity grid.
+    Operations are applied in the same order as calculate_dcf, so any single
+    cell equals the scalar result exactly.
+
+    Args:
+        free_cash_flow: Most recent FCF (scalar or array).
+        growth_rate: Annual growth rate over the projection period (decimal).
+        terminal_growth_rate: Perpetual growth rate (decimal).
+        discount_rate: WACC (decimal).
+        years: Number of years to project.
+        shares_outstanding: Total shares.
+        net_debt: Total Debt - Cash.
+        growth_path: Optional per-year growth rates with shape (..., years); overrides growth_rate.
+
+    Returns:
+        Dictionary of arrays: 'fair_value', 'enterprise_value', 'equity_value',
+        'terminal_value', 'pv_terminal_value', plus 'fcf' and 'pv' with a trailing
+        years axis.
+    """
+    fcf = np.asarray(free_cash_flow, dtype=float)
+    terminal_growth_rate = np.asarray(terminal_growth_rate, dtype=float)
+    discount_rate = np.asarray(discount_rate, dtype=float)
+    if growth_path is not None:
+        growth_path = np.asarray(growth_path, dtype=float)
+        if growth_path.shape[-1] != years:
+            raise ValueError(f"growth_path must have {years} entries on its last axis")
+        growths = [growth_path[..., i] for i in range(years)]
+    else:
+        growths = [np.asarray(growth_rate, dtype=float)] * years
+
+    current_fcf = fcf
+    sum_pv_fcf = 0
+    fcfs, pvs = [], []
+
+    # 1. Project Cash Flows (years is small; every step is vectorized over the grid)
+    for i in range(1, years + 1):
+        current_fcf = current_fcf * (1 + growths[i - 1])
+        pv = current_fcf / (1 + discount_rate) ** i
+        sum_pv_fcf = sum_pv_fcf + pv
+        fcfs.append(current_fcf)
+        pvs.append(pv)
+
+    # 2. Terminal Value (Gordon Growth)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terminal_value = (current_fcf * (1 + terminal_growth_rate)) / (discount_rate - terminal_growth_rate)
+    pv_terminal_value = terminal_value / ((1 + discount_rate) ** years)
+
+    # 3-5. Enterprise, Equity and per-share value
+    enterprise_value = sum_pv_fcf + pv_terminal_value
+    equity_value = enterprise_value - np.asarray(net_debt, dtype=float)
+    fair_value = equity_value / np.asarray(shares_outstanding, dtype=float)
+
+    shape = np.shape(fair_value)
+    return {
+        "fair_value": fair_value,
+        "enterprise_value": enterprise_value,
+        "equity_value": equity_value,
+        "terminal_value": terminal_value,
+        "pv_terminal_value": pv_terminal_value,
+        "fcf": np.stack([np.broadcast_to(f, shape) for f in fcfs], axis=-1),
+        "pv": np.stack([np.broadcast_to(p, shape) for p in pvs], axis=-1),
+    }
+
+
+@timed
+def dcf_sensitivity(
+    free_cash_flow: float,
+    growth_rates,
+    discount_rates,
+    terminal_growth_rate: float,
+    years: int = 5,
+    shares_outstanding: float = 1,
+    net_debt: float = 0
+) -> pd.DataFrame:
+    """
+    Fair value per share for every (discount rate, growth rate) pair.
+
+    Returns:
+        DataFrame with discount rates as rows and growth rates as columns.
+    """
+    growth_rates = np.asarray(growth_rates, dtype=float)
+    discount_rates = np.asarray(discount_rates, dtype=float)
+    grid = calculate_dcf_grid(
+        free_cash_flow,
+        growth_rates[None, :],
+        terminal_growth_rate,
+        discount_rates[:, None],
+        years=years,
+        shares_outstanding=shares_outstanding,
+        net_debt=net_debt
+    )
+    return pd.DataFrame(
+        grid["fair_value"],
+        index=pd.Index(discount_rates, name="Discount Rate"),
+        columns=pd.Index(growth_rates, name="Growth Rate")
+    )
+
+
+@timed
+def simulate_dcf(
+    free_cash_flow: float,
+    growth_rate,
+    terminal_growth_rate,
+    discount_rate,
+    n_draws: int = 100_000,
+    years: int = 5,
+    shares_outstanding: float = 1,
+    net_debt: float = 0,
+    percentiles=(5, 25, 50, 75, 95),
+    seed=None
+) -> dict:
+    """
+    Monte Carlo DCF: samples assumptions and summarises the fair-value distribution.
+
+    Each assumption is either a fixed number or a (mean, std) tuple sampled from a
+    normal distribution. Draws where the discount rate does not exceed the terminal
+    growth rate have no finite Gordon terminal value and are discarded.
+
+    Args:
+        free_cash_flow: Most recent FCF (or TTM).
+        growth_rate: Growth rate, fixed or (mean, std) (decimal).
+        terminal_growth_rate: Terminal growth rate, fixed or (mean, std) (decimal).
+        discount_rate: WACC, fixed or (mean, std) (decimal).
+        n_draws: Number of simulated scenarios.
+        years: Number of years to project.
+        shares_outstanding: Total shares.
+        net_debt: Total Debt - Cash.
+        percentiles: Percentiles of fair value to report.
+        seed: Seed for reproducible draws.
+
+    Returns:
+        Dictionary with 'percentiles' (percentile -> fair value), 'mean',
+        'valid_draws' and 'fair_values' (the valid simulated values).
+    """
+    rng = np.random.default_rng(seed)
+
+    def sample(spec):
+        if isinstance(spec, tuple):
+            mean, std = spec
+            return rng.normal(mean, std, n_draws)
+        return np.full(n_draws, float(spec))
+
+    g = sample(growth_rate)
+    tg = sample(terminal_growth_rate)
+    r = sample(discount_rate)
+    valid = r > tg
+
+    fair_values = calculate_dcf_grid(
+        free_cash_flow, g[valid], tg[valid], r[valid],
+        years=years, shares_outstanding=shares_outstanding, net_debt=net_debt
+    )["fair_value"]
+
+    if fair_values.size == 0:
+        pct = {p: float("nan") for p in percentiles}
+        mean = float("nan")
+    else:
+        pct = dict(zip(percentiles, np.percentile(fair_values, percentiles).tolist()))
+        mean = float(fair_values.mean())
+    return {
+        "percentiles": pct,
+        "mean": mean,
+        "valid_draws": int(valid.sum()),
+        "fair_values": fair_values,
+    }
@@ -0,0 +1,124 @@
+"""
+Async counterpart of StockDataLoader for loading a ticker's datasets concurrently.
+
+The fetchers themselves are blocking (yfinance is synchronous), so each one runs
+on a shared thread pool; the event loop only bounds how many run at once and
+how long we wait for each. A page's data load then takes about as long as its
+slowest request instead of the sum of all of them.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import instrumentation
+import upstream
+from data_loader import StockDataLoader, quote_service
+from scheduler import current_priority, priority
+
+DATASETS = ("history", "financials", "balance_sheet", "cashflow", "info", "quote")
+
+# Not the loop's default executor: asyncio.run() waits for that on exit, which
+# would turn a timed-out request back into a blocking one
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="async-loader")
+
+
+class AsyncStockDataLoader:
+    """
+    Awaitable versions of the StockDataLoader fetchers.
+
+    Create one instance per event loop; its semaphore belongs to that loop.
+    """
+
+    def __init__(self, max_concurrency: int = 6, timeout: float = 30.0):
+        """
+        Args:
+            max_concurrency: Maximum number of requests in flight at once.
+            timeout: Seconds to wait for a single request before giving up on it.
+        """
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _call(self, func, *args, **kwargs):
+        # Worker threads count their upstream calls and spans towards the caller's render,
+        # and queue for upstream at the caller's priority
+        counter = upstream.current()
+        rerun = instrumentation.current()
+        level = current_priority()
+
+        def run():
+            with upstream.tracking(counter), instrumentation.attach(rerun), priority(level):
+                return func(*args, **kwargs)
+
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await asyncio.wait_for(loop.run_in_executor(_executor, run), self.timeout)
+
+    async def fetch_history(self, ticker_symbol: str, period: str = "1y", interval: str = "1d"):
+        compact = await self._call(StockDataLoader.fetch_history_compact, ticker_symbol, period, interval)
+        return compact.to_frame()
+
+    async def fetch_financials(self, ticker_symbol: str, quarterly: bool = False):
+        return await self._call(StockDataLoader.fetch_financials, ticker_symbol, quarterly)
+
+    async def fetch_balance_sheet(self, ticker_symbol: str, quarterly: bool = False):
+        return await self._call(StockDataLoader.fetch_balance_sheet, ticker_symbol, quarterly)
+
+    async def fetch_cashflow(self, ticker_symbol: str, quarterly: bool = False):
+        return await self._call(StockDataLoader.fetch_cashflow, ticker_symbol, quarterly)
+
+    async def fetch_info(self, ticker_symbol: str):
+        return await self._call(StockDataLoader.fetch_info, ticker_symbol)
+
+    async def fetch_quote(self, ticker_symbol: str):
+        return await self._call(quote_service.get, ticker_symbol)
+
+    async def fetch_all(self, ticker_symbol: str, datasets=DATASETS, quarterly: bool = False,
+                        period: str = "1y", interval: str = "1d") -> dict:
+        """
+        Fetches several datasets for one ticker in a single gather.
+
+        Args:
+            ticker_symbol: The stock ticker.
+            datasets: Any of DATASETS.
+            quarterly: Frequency of the statements.
+            period: History period.
+            interval: History interval.
+
+        Returns:
+            Dictionary keyed by dataset. A dataset that failed or timed out maps to
+            its exception instead of data, so one slow request does not sink the rest.
+        """
+        calls = {
+            "history": lambda: self.fetch_history(ticker_symbol, period, interval),
+            "financials": lambda: self.fetch_financials(ticker_symbol, quarterly),
+            "balance_sheet": lambda: self.fetch_balance_sheet(ticker_symbol, quarterly),
+            "cashflow": lambda: self.fetch_cashflow(ticker_symbol, quarterly),
+            "info": lambda: self.fetch_info(ticker_symbol),
+            "quote": lambda: self.fetch_quote(ticker_symbol),
+        }
+        unknown = set(datasets) - set(calls)
+        if unknown:
+            raise ValueError(f"Unknown datasets: {sorted(unknown)}")
+        datasets = list(dict.fromkeys(datasets))
+        results = await asyncio.gather(*(calls[d]() for d in datasets), return_exceptions=True)
+        return dict(zip(datasets, results))
+
+
+def load_all(ticker_symbol: str, datasets=DATASETS, quarterly: bool = False, period: str = "1y",
+             interval: str = "1d", max_concurrency: int = 6, timeout: float = 30.0) -> dict:
+    """
+    Blocking wrapper around AsyncStockDataLoader.fetch_all for synchronous callers
+    such as the Streamlit script.
+
+    Returns:
+        Same as AsyncStockDataLoader.fetch_all.
+    """
+    async def gather():
+        loader = AsyncStockDataLoader(max_concurrency=max_concurrency, timeout=timeout)
+        return await loader.fetch_all(ticker_symbol, datasets, quarterly, period, interval)
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(gather())
+    # Called from inside a running loop (e.g. a notebook): run ours on a worker thread
+    return _executor.submit(asyncio.run, gather()).result()
@@ -0,0 +1,110 @@
+"""
+Result caching for the data layer that does not require Streamlit.
+
+`cache_data` is a drop-in for `st.cache_data`. Inside the app (streamlit already
+imported) it *is* st.cache_data; in headless use such as the CLI or cron jobs it
+falls back to a small in-process memo with the same TTL and the same rule that
+parameters starting with an underscore are not part of the key. Streamlit is
+never imported by this module.
+
+With instrumentation enabled, every call is a span named after the function and
+counted as a cache hit or miss.
+"""
+import functools
+import inspect
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import instrumentation
+
+
+def _memoize(func, ttl: float = None, max_entries: int = 256):
+    signature = inspect.signature(func)
+    entries = OrderedDict()
+    lock = threading.Lock()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = tuple((name, value) for name, value in bound.arguments.items() if not name.startswith("_"))
+        try:
+            hash(key)
+        except TypeError:
+            return func(*args, **kwargs)
+
+        now = time.monotonic()
+        with lock:
+            hit = entries.get(key)
+            if hit is not None and (ttl is None or now - hit[0] < ttl):
+                entries.move_to_end(key)
+                return hit[1]
+        result = func(*args, **kwargs)
+        with lock:
+            entries[key] = (now, result)
+            entries.move_to_end(key)
+            while len(entries) > max_entries:
+                entries.popitem(last=False)
+        return result
+
+    def clear():
+        with lock:
+            entries.clear()
+
+    wrapper.clear = clear
+    return wrapper
+
+
+def _cache(func, ttl: float, max_entries: int):
+    st = sys.modules.get("streamlit")
+    if st is not None:
+        return st.cache_data(ttl=ttl)(func)
+    return _memoize(func, ttl, max_entries)
+
+
+def _instrumented(func, ttl: float, max_entries: int):
+    """Wraps a cached function so each call is timed and counted as a hit or a miss."""
+    name = func.__name__
+    local = threading.local()
+
+    @functools.wraps(func)
+    def compute(*args, **kwargs):
+        # Only runs on a miss
+        local.missed = True
+        return func(*args, **kwargs)
+
+    cached = _cache(compute, ttl, max_entries)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        local.missed = False
+        with instrumentation.span(name):
+            result = cached(*args, **kwargs)
+        instrumentation.count_cache(name, hit=not local.missed)
+        return result
+
+    wrapper.clear = cached.clear
+    return wrapper
+
+
+def cache_data(func=None, *, ttl: float = None, max_entries: int = 256):
+    """
+    Caches a function's return value, like st.cache_data.
+
+    Args:
+        func: The function (when used as a bare @cache_data).
+        ttl: Seconds an entry stays valid; None for no expiry.
+        max_entries: Entries kept by the headless memo (least recently used are dropped).
+
+    Note:
+        The headless memo returns the cached object itself, not a copy, so callers
+        must not mutate results in place.
+    """
+    def decorate(f):
+        if instrumentation.ENABLED:
+            return _instrumented(f, ttl, max_entries)
+        return _cache(f, ttl, max_entries)
+
+    return decorate(func) if func is not None else decorate
@@ -0,0 +1,206 @@
+"""
+vd-financials: headless batch analysis for a universe of tickers.
+
+For every ticker: fetch statements and info -> calculate_fundamental_metrics ->
+calculate_dcf, fanned out over a process pool (one process per core by default).
+Each ticker's rows are appended to the output file as soon as it finishes, so
+memory stays flat however large the universe. Streamlit is not imported.
+
+    vd-financials AAPL MSFT NVDA -o results.parquet
+    vd-financials --tickers-file universe.txt -o results.csv --quarterly --workers 16
+
+Output is a tidy table with columns Ticker, Date, Metric, Value. DCF results
+('DCF Fair Value', 'DCF Upside %', 'Free Cash Flow', 'Net Debt', 'Current Price')
+are dated at the latest statement period.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+# Allow running as a script (python src/cli.py) as well as through the entry point
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+logger = logging.getLogger("vd-financials")
+
+COLUMNS = ["Ticker", "Date", "Metric", "Value"]
+
+# Upstream requests per second shared by all worker processes
+DEFAULT_RATE = 10.0
+
+
+def read_tickers(path: str) -> list:
+    """Reads one ticker per line; blank lines and '#' comments are ignored."""
+    with open(path) as f:
+        lines = (line.split("#", 1)[0].strip() for line in f)
+        return [line.upper() for line in lines if line]
+
+
+def _init_worker(rate: float):
+    import data_loader
+    from rate_limit import RateLimiter
+
+    # Each process gets its share of the global request budget
+    data_loader.bulk_rate_limiter = RateLimiter(rate=rate, burst=max(1, int(rate)))
+
+
+def analyze_ticker(symbol: str, quarterly: bool, growth: float, terminal_growth: float, wacc: float) -> pd.DataFrame:
+    """
+    Fetches one ticker's statements and returns its metrics and DCF as tidy rows.
+
+    Runs in a worker process; raises if the ticker has no usable statements.
+    """
+    import analysis
+    import data_loader
+    from data_loader import StockDataLoader
+    from scheduler import BULK, priority
+
+    # Throttled by this process's share of bulk_rate_limiter (see _init_worker). Stale entries are
+    # re-fetched rather than revalidated in the background: this process exits once the run is done.
+    statements = StockDataLoader.fetch_statements_many([symbol], quarterly=quarterly, max_workers=3, stale_ok=False)
+    frames = {}
+    for kind, df in statements.items():
+        frames[kind] = df.xs(symbol, level="Ticker") if not df.empty else pd.DataFrame()
+    financials, balance_sheet, cashflow = frames["financials"], frames["balance_sheet"], frames["cashflow"]
+    if financials.empty:
+        raise ValueError("no income statement")
+    financials.index = pd.to_datetime(financials.index)
+
+    metrics = analysis.calculate_fundamental_metrics(financials, balance_sheet, cashflow)
+    tidy = metrics.rename_axis(index="Metric", columns="Date").stack().rename("Value").reset_index()
+
+    if not balance_sheet.empty and not cashflow.empty:
+        with priority(BULK):
+            info = StockDataLoader.fetch_info(symbol, stale_ok=False, _limiter=data_loader.bulk_rate_limiter)
+        inputs = analysis.dcf_inputs(balance_sheet, cashflow, info)
+        dcf = analysis.calculate_dcf(
+            free_cash_flow=inputs["free_cash_flow"],
+            growth_rate=growth,
+            terminal_growth_rate=terminal_growth,
+            discount_rate=wacc,
+            shares_outstanding=inputs["shares_outstanding"],
+            net_debt=inputs["net_debt"],
+        )
+        price = inputs["current_price"]
+        upside = (dcf["fair_value"] - price) / price * 100 if price else float("nan")
+        values = {
+            "Free Cash Flow": inputs["free_cash_flow"],
+            "Net Debt": inputs["net_debt"],
+            "Current Price": price,
+            "DCF Fair Value": dcf["fair_value"],
+            "DCF Upside %": upside,
+        }
+        latest = financials.index.max()
+        dcf_rows = pd.DataFrame({"Date": latest, "Metric": list(values), "Value": list(values.values())})
+        tidy = pd.concat([tidy, dcf_rows], ignore_index=True)
+
+    tidy.insert(0, "Ticker", symbol)
+    tidy["Date"] = pd.to_datetime(tidy["Date"]).astype("datetime64[ns]")
+    tidy["Value"] = pd.to_numeric(tidy["Value"], errors="coerce").astype(float)
+    return tidy[COLUMNS]
+
+
+class _ResultWriter:
+    """Appends tidy frames to a Parquet or CSV file as they arrive."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rows = 0
+        self._parquet = path.endswith(".parquet")
+        self._writer = None
+        self._csv = None
+
+    def write(self, df: pd.DataFrame):
+        if self._parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table.cast(self._writer.schema))
+        else:
+            if self._csv is None:
+                self._csv = open(self.path, "w", newline="")
+                df.iloc[:0].to_csv(self._csv, index=False)
+            df.to_csv(self._csv, index=False, header=False)
+            self._csv.flush()
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        elif self._parquet:
+            # Nothing succeeded: still leave a valid, empty file behind
+            pd.DataFrame({c: pd.Series(dtype=t) for c, t in
+                          zip(COLUMNS, ["object", "datetime64[ns]", "object", "float64"])}).to_parquet(self.path)
+        if self._csv is not None:
+            self._csv.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="vd-financials", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("tickers", nargs="*", help="Ticker symbols")
+    parser.add_argument("--tickers-file", help="File with one ticker per line")
+    parser.add_argument("-o", "--output", required=True, help="Output file (.parquet or .csv)")
+    parser.add_argument("--quarterly", action="store_true", help="Use quarterly instead of annual statements")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default: all cores)")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help="Upstream requests per second across all workers")
+    parser.add_argument("--growth", type=float, default=0.10, help="DCF growth rate (decimal)")
+    parser.add_argument("--terminal-growth", type=float, default=0.025, help="DCF terminal growth rate (decimal)")
+    parser.add_argument("--wacc", type=float, default=0.09, help="DCF discount rate (decimal)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only report the summary")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO, format="%(message)s")
+
+    tickers = [t.upper() for t in args.tickers]
+    if args.tickers_file:
+        tickers += read_tickers(args.tickers_file)
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        parser.error("no tickers given")
+    if not args.output.endswith((".parquet", ".csv")):
+        parser.error("--output must end in .parquet or .csv")
+
+    workers = max(1, min(args.workers or 1, len(tickers)))
+    start = time.monotonic()
+    writer = _ResultWriter(args.output)
+    failed = {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(args.rate / workers,)) as pool:
+            futures = {
+                pool.submit(analyze_ticker, t, args.quarterly, args.growth, args.terminal_growth, args.wacc): t
+                for t in tickers
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                # Drop our reference so finished results can be freed
+                symbol = futures.pop(future)
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    failed[symbol] = str(e)
+                    logger.info("[%d/%d] %s failed: %s", done, len(tickers), symbol, e)
+                    continue
+                writer.write(rows)
+                logger.info("[%d/%d] %s: %d rows", done, len(tickers), symbol, len(rows))
+    finally:
+        writer.close()
+
+    elapsed = time.monotonic() - start
+    logger.warning("%d/%d tickers, %d rows -> %s in %.1fs (%d workers)",
+                   len(tickers) - len(failed), len(tickers), writer.rows, args.output, elapsed, workers)
+    if failed:
+        logger.warning("Failed: %s", ", ".join(sorted(failed)))
+    return 2 if len(failed) == len(tickers) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
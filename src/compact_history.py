@@ -0,0 +1,91 @@
+"""
+Compact columnar storage for price history.
+
+yfinance history frames hold float64 OHLCV plus Dividends and Stock Splits
+columns that are zero for almost every bar, on a tz-aware index. CompactHistory
+keeps the same data as contiguous NumPy arrays:
+
+- prices as float32 (about 7 significant digits, ample for charting),
+- Volume as uint32 when it fits, otherwise int64,
+- timestamps as int64 epoch seconds plus the timezone name,
+- corporate-action columns only if they contain a non-zero value.
+
+That is well under half the memory of the original frame, which matters for
+minute bars of hundreds of symbols held in st.cache_data.
+"""
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ("Open", "High", "Low", "Close", "Adj Close")
+
+# Kept only when non-zero somewhere in the series
+ACTION_COLUMNS = ("Dividends", "Stock Splits", "Capital Gains")
+
+
+class CompactHistory:
+    """
+    History of one symbol as contiguous arrays.
+
+    Attributes:
+        timestamps: int64 epoch seconds (UTC) per bar.
+        tz: Timezone name of the original index, or None if it was naive.
+        columns: Column name -> 1-D array, in the original column order.
+    """
+
+    def __init__(self, timestamps: np.ndarray, columns: dict, tz: str = None):
+        self.timestamps = timestamps
+        self.columns = columns
+        self.tz = tz
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the arrays."""
+        return self.timestamps.nbytes + sum(a.nbytes for a in self.columns.values())
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "CompactHistory":
+        """
+        Args:
+            df: History as returned by yfinance / StockDataLoader.fetch_history.
+        """
+        index = pd.DatetimeIndex(df.index)
+        tz = str(index.tz) if index.tz is not None else None
+        if tz is not None:
+            index = index.tz_convert("UTC").tz_localize(None)
+        timestamps = np.ascontiguousarray(index.as_unit("s").asi8, dtype=np.int64)
+
+        columns = {}
+        for name in df.columns:
+            values = df[name].to_numpy()
+            if name in ACTION_COLUMNS:
+                if not np.any(np.nan_to_num(values.astype(np.float64))):
+                    continue
+                columns[name] = np.ascontiguousarray(values, dtype=np.float64)
+            elif name == "Volume":
+                volume = np.nan_to_num(values.astype(np.float64))
+                small = len(volume) == 0 or (volume.min() >= 0 and volume.max() <= np.iinfo(np.uint32).max)
+                columns[name] = np.ascontiguousarray(volume, dtype=np.uint32 if small else np.int64)
+            elif name in PRICE_COLUMNS:
+                columns[name] = np.ascontiguousarray(values, dtype=np.float32)
+            else:
+                columns[name] = np.ascontiguousarray(values)
+        return cls(timestamps, columns, tz)
+
+    def index(self) -> pd.DatetimeIndex:
+        """The timestamps as a DatetimeIndex in the original timezone."""
+        index = pd.DatetimeIndex(self.timestamps.view("datetime64[s]"), name="Date")
+        if self.tz is not None:
+            index = index.tz_localize("UTC").tz_convert(self.tz)
+        return index
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Converts to a DataFrame for the chart code.
+
+        Columns are views of the stored arrays (no copy), so treat the result as
+        read-only; only the index is materialised.
+        """
+        return pd.DataFrame(self.columns, index=self.index(), copy=False)
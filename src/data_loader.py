@@ -1,78 +1,583 @@
-import yfinance as yf
+from __future__ import annotations
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
 import pandas as pd
-import streamlit as st
+
+import upstream
+from caching import cache_data
+from compact_history import CompactHistory
+from disk_cache import DiskCache, statement_dataset
+from history_store import MAX_PERIODS, HistoryStore, max_span, period_start
+from price_archive import PriceArchive
+from quote_service import QuoteService
+from rate_limit import RateLimiter
+from revalidate import Revalidator
+from scheduler import BULK, RequestScheduler, UpstreamUnavailable, priority
+from single_flight import SingleFlight
+from ticker_resolver import ResolutionUncertain, TickerResolver
+
+if TYPE_CHECKING:
+    import yfinance as yf
+
+logger = logging.getLogger(__name__)
+
+STATEMENTS = ("financials", "balance_sheet", "cashflow")
+
+# Tickers per yf.download call; very large batches hit URL and response limits
+DOWNLOAD_CHUNK_SIZE = 100
+
+# Every request to Yahoo goes through this: one token bucket, page loads first, retries, circuit breaker
+UPSTREAM_RATE = float(os.environ.get("VD_UPSTREAM_RATE", 10.0))
+scheduler = RequestScheduler(rate=UPSTREAM_RATE, burst=int(os.environ.get("VD_UPSTREAM_BURST", 20)))
+# Persistent tier behind cache_data (st.cache_data in the app), shared across restarts and worker processes
+disk_cache = DiskCache()
+# Background refreshes of stale entries (stale-while-revalidate), a few at a time
+revalidator = Revalidator(max_concurrent=4)
+# One incrementally refreshed series per (ticker, interval); periods are slices of it
+history_store = HistoryStore(disk_cache, revalidator=revalidator, scheduler=scheduler)
+# Auto-Detect exchange lookup; a listing exists if it has at least one daily bar
+ticker_resolver = TickerResolver(lambda symbol: not history_store.get(symbol, "1d", "1d").empty, disk_cache)
+# Intraday bars older than yfinance still serves: `vd-prewarm --archive 1m` appends to it,
+# and fetch_history reads from it (via memory maps) for periods reaching further back
+price_archive = PriceArchive()
+# Concurrent misses for the same request (e.g. many sessions at market open) share one fetch
+flights = SingleFlight()
+# Caps the bulk fetchers at half the scheduler's rate so watchlist loads leave room for page loads
+bulk_rate_limiter = RateLimiter(rate=UPSTREAM_RATE / 2, burst=max(1, int(UPSTREAM_RATE / 2)))
+
+
+def _history(ticker_symbol: str, period: str, interval: str) -> pd.DataFrame:
+    """History from the store, preceded by archived bars where the period reaches past what upstream serves."""
+    history = flights.do(
+        ("history", ticker_symbol, period, interval),
+        lambda: history_store.get(ticker_symbol, period=period, interval=interval),
+    )
+    span = max_span(interval)
+    if span is None:
+        return history
+    now = pd.Timestamp.now(tz="UTC")
+    start = period_start(period, now)
+    if period.endswith("d") and period != "ytd":
+        # 'Nd' counts trading days, which the store serves whenever N calendar days would fit
+        if pd.Timedelta(days=int(period[:-1])) <= span:
+            return history
+    elif start is not None and start >= now - span:
+        return history
+    end = history.index[0] - pd.Timedelta(seconds=1) if not history.empty else None
+    older = price_archive.open(ticker_symbol, interval).slice(start, end)
+    if not len(older):
+        return history
+    older = older.to_frame()
+    if not history.empty and older.index.tz is not None:
+        older.index = older.index.tz_convert(history.index.tz)
+    return pd.concat([older, history])
+
+
+def _yf():
+    """yfinance, imported on first fetch rather than at startup (it is slow to import)."""
+    import yfinance
+    return yfinance
+
+
+def _statement(ticker_symbol: str, statement: str, quarterly: bool, ticker: yf.Ticker = None,
+               limiter: RateLimiter = None, stale_ok: bool = True) -> pd.DataFrame:
+    """
+    Loads a transposed (Date-indexed) statement, going through the disk cache.
+    A stale cached statement is returned at once and refreshed in the background,
+    unless stale_ok is False, in which case it is re-fetched before returning.
+    While the scheduler's circuit is open, an expired cached statement is served.
+    """
+    dataset = statement_dataset(quarterly)
+    key = ("statement", ticker_symbol, statement, quarterly)
+
+    def download():
+        if limiter is not None:
+            limiter.acquire()
+        attr = f"quarterly_{statement}" if quarterly else statement
+        # Transpose so dates are rows
+        df = scheduler.call("statement", lambda: getattr(ticker or _yf().Ticker(ticker_symbol), attr)).T
+        disk_cache.set_frame(dataset, df, ticker=ticker_symbol, statement=statement)
+        return df
+
+    cached, fresh = disk_cache.peek_frame(dataset, ticker=ticker_symbol, statement=statement)
+    if cached is not None and (fresh or stale_ok):
+        if not fresh:
+            revalidator.submit(key, lambda: flights.do(key, download))
+        return cached
+
+    def load():
+        # A flight that finished just before this one started may have stored it
+        cached = disk_cache.get_frame(dataset, ticker=ticker_symbol, statement=statement)
+        if cached is not None:
+            return cached
+        try:
+            return download()
+        except UpstreamUnavailable:
+            expired, _ = disk_cache.peek_frame(dataset, expired_ok=True, ticker=ticker_symbol, statement=statement)
+            if expired is None:
+                raise
+            return expired
+
+    return flights.do(key, load)
+
+
+def _info(ticker_symbol: str, ticker: yf.Ticker = None, limiter: RateLimiter = None,
+          stale_ok: bool = True) -> dict:
+    """Loads the yfinance info dict, going through the disk cache (stale-while-revalidate, like _statement)."""
+    key = ("info", ticker_symbol)
+
+    def download():
+        if limiter is not None:
+            limiter.acquire()
+        info = scheduler.call("info", lambda: (ticker or _yf().Ticker(ticker_symbol)).info)
+        disk_cache.set_json("info", info, ticker=ticker_symbol)
+        return info
+
+    info, fresh = disk_cache.peek_json("info", ticker=ticker_symbol)
+    if info is not None and (fresh or stale_ok):
+        if not fresh:
+            revalidator.submit(key, lambda: flights.do(key, download))
+        return info
+
+    def load():
+        info = disk_cache.get_json("info", ticker=ticker_symbol)
+        if info is not None:
+            return info
+        try:
+            return download()
+        except UpstreamUnavailable:
+            expired, _ = disk_cache.peek_json("info", expired_ok=True, ticker=ticker_symbol)
+            if expired is None:
+                raise
+            return expired
+
+    return flights.do(key, load)
+
+
+def _download_chunk(tickers: list, period: str, interval: str) -> pd.DataFrame:
+    """Downloads one chunk with yf.download, returned in long format indexed by (Ticker, Date)."""
+    raw = scheduler.call("history_batch", lambda: _yf().download(
+        tickers, period=period, interval=interval, group_by="ticker",
+        auto_adjust=True, actions=True, threads=True, progress=False))
+    if raw.empty:
+        return pd.DataFrame()
+    if not isinstance(raw.columns, pd.MultiIndex):
+        raw.columns = pd.MultiIndex.from_product([tickers, raw.columns])
+    frames = {t: raw[t] for t in raw.columns.get_level_values(0).unique()}
+    long = pd.concat(frames, names=["Ticker", "Date"])
+    # Dates on which a symbol did not trade come back as all-NaN rows
+    return long.dropna(how="all")
+
+
+def _fetch_quotes(symbols: list) -> dict:
+    """
+    Last price and previous close for many symbols, one yf.download per chunk.
+
+    Uses the last two unadjusted daily closes; during market hours the last
+    daily bar is the live price.
+    """
+    quotes = {}
+    for i in range(0, len(symbols), DOWNLOAD_CHUNK_SIZE):
+        chunk = symbols[i:i + DOWNLOAD_CHUNK_SIZE]
+        raw = scheduler.call("quote_batch", lambda: _yf().download(
+            chunk, period="5d", interval="1d", group_by="ticker",
+            auto_adjust=False, threads=True, progress=False))
+        if raw.empty:
+            continue
+        if not isinstance(raw.columns, pd.MultiIndex):
+            raw.columns = pd.MultiIndex.from_product([chunk, raw.columns])
+        for symbol in raw.columns.get_level_values(0).unique():
+            closes = raw[symbol]["Close"].dropna()
+            if closes.empty:
+                continue
+            quotes[symbol] = {
+                "last_price": float(closes.iloc[-1]),
+                "previous_close": float(closes.iloc[-2]) if len(closes) > 1 else float("nan"),
+            }
+    return quotes
+
+
+# Live quotes shared by all sessions; one batched poll covers every symbol on screen
+quote_service = QuoteService(_fetch_quotes)
+
 
 class StockDataLoader:
     """Handles fetching data from yfinance."""
 
     @staticmethod
-    @st.cache_data
+    @cache_data(ttl=60) # Short-lived: freshness is handled by history_store
     def fetch_history(ticker_symbol: str, period: str = "1y", interval: str = "1d") -> pd.DataFrame:
         """
         Fetches historical stock data.
-        
+
         Args:
             ticker_symbol: The stock ticker (e.g., 'AAPL').
             period: The data period to download (e.g., '1y', '5y', 'max').
             interval: The data interval (e.g., '1d', '1m').
-            
+
         Returns:
-            DataFrame containing historical data.
+            DataFrame containing historical data. Intraday periods longer than
+            yfinance serves start with bars from the local price archive.
         """
-        ticker = yf.Ticker(ticker_symbol)
-        history = ticker.history(period=period, interval=interval)
-        return history
+        return _history(ticker_symbol, period, interval)
+
+    @staticmethod
+    @cache_data(ttl=60)
+    def fetch_history_compact(ticker_symbol: str, period: str = "1y", interval: str = "1d") -> CompactHistory:
+        """
+        Same as fetch_history, cached in the compact columnar form (float32 prices,
+        epoch-second timestamps, no all-zero action columns). Call .to_frame() for
+        a zero-copy DataFrame.
+        """
+        return CompactHistory.from_frame(_history(ticker_symbol, period, interval))
+
+    @staticmethod
+    @cache_data(ttl=3600)
+    def _resolve_ticker(symbol: str):
+        # Raises ResolutionUncertain when probes failed, so those answers are never cached
+        return ticker_resolver.resolve(symbol)
 
     @staticmethod
-    @st.cache_data
-    def fetch_financials(ticker_symbol: str, quarterly: bool = False) -> pd.DataFrame:
+    def resolve_ticker(symbol: str):
+        """
+        Finds the exchange listing for a bare symbol (e.g. 'NOVO-B' -> 'NOVO-B.CO').
+
+        Returns:
+            The resolved ticker, or None if no candidate listing has data. When
+            probes failed, the best answer found so far, which is not cached.
+        """
+        try:
+            return StockDataLoader._resolve_ticker(symbol)
+        except ResolutionUncertain as e:
+            return e.resolved
+
+    @staticmethod
+    @cache_data(ttl=3600) # Expires so background revalidations in the disk tier reach sessions
+    def fetch_financials(ticker_symbol: str, quarterly: bool = False, _ticker: yf.Ticker = None) -> pd.DataFrame:
         """
         Fetches financials (Income Statement).
-        
+
         Args:
             ticker_symbol: The stock ticker.
             quarterly: Whether to fetch quarterly data instead of annual.
-            
+            _ticker: Optional shared yf.Ticker to reuse (not part of the cache key).
+
         Returns:
             DataFrame of financials (Income Statement).
         """
-        ticker = yf.Ticker(ticker_symbol)
         # yfinance returns financials with columns as dates
-        if quarterly:
-            return ticker.quarterly_financials.T
-        return ticker.financials.T # Transpose so dates are rows
+        return _statement(ticker_symbol, "financials", quarterly, _ticker)
 
     @staticmethod
-    @st.cache_data
+    @cache_data(ttl=3600)
+    def fetch_info(ticker_symbol: str, _ticker: yf.Ticker = None, stale_ok: bool = True,
+                   _limiter: RateLimiter = None) -> dict:
+        """
+        Fetches the yfinance info dict (company profile, shares, valuation fields).
+        With stale_ok=False a stale cached dict is re-fetched instead of revalidated in the background.
+        A `_limiter` throttles only a request that actually goes upstream.
+        """
+        return _info(ticker_symbol, _ticker, _limiter, stale_ok=stale_ok)
+
+    @staticmethod
+    @cache_data
     def fetch_company_name(ticker_symbol: str) -> str:
         """
         Fetches the full company name.
         """
         try:
-            ticker = yf.Ticker(ticker_symbol)
-            info = ticker.info
+            info = _info(ticker_symbol)
             return info.get('longName', info.get('shortName', ticker_symbol))
         except Exception:
             return ticker_symbol
 
     @staticmethod
-    @st.cache_data
-    def fetch_balance_sheet(ticker_symbol: str, quarterly: bool = False) -> pd.DataFrame:
+    @cache_data(ttl=3600)
+    def fetch_balance_sheet(ticker_symbol: str, quarterly: bool = False, _ticker: yf.Ticker = None) -> pd.DataFrame:
         """
         Fetches Balance Sheet.
         """
-        ticker = yf.Ticker(ticker_symbol)
-        if quarterly:
-            return ticker.quarterly_balance_sheet.T
-        return ticker.balance_sheet.T
+        return _statement(ticker_symbol, "balance_sheet", quarterly, _ticker)
 
     @staticmethod
-    @st.cache_data
-    def fetch_cashflow(ticker_symbol: str, quarterly: bool = False) -> pd.DataFrame:
+    @cache_data(ttl=3600)
+    def fetch_cashflow(ticker_symbol: str, quarterly: bool = False, _ticker: yf.Ticker = None) -> pd.DataFrame:
         """
         Fetches Cash Flow Statement.
         """
-        ticker = yf.Ticker(ticker_symbol)
-        if quarterly:
-            return ticker.quarterly_cashflow.T
-        return ticker.cashflow.T
+        return _statement(ticker_symbol, "cashflow", quarterly, _ticker)
+
+    @staticmethod
+    def fetch_history_many(tickers: list, period: str = "1y", interval: str = "1d",
+                           chunk_size: int = DOWNLOAD_CHUNK_SIZE) -> pd.DataFrame:
+        """
+        Fetches price history for many tickers with yfinance's multi-symbol download,
+        at bulk priority.
+
+        Args:
+            tickers: Stock tickers (duplicates are ignored).
+            period: The data period to download (e.g., '1y', '5y', 'max').
+            interval: The data interval (e.g., '1d', '1m').
+            chunk_size: Tickers per upstream request.
+
+        Returns:
+            Long-format DataFrame indexed by (Ticker, Date) with OHLCV columns.
+            Tickers that returned no data, or whose chunk failed after retries,
+            are absent.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        frames = []
+        with priority(BULK):
+            for i in range(0, len(tickers), chunk_size):
+                chunk = tickers[i:i + chunk_size]
+                bulk_rate_limiter.acquire()
+                try:
+                    frames.append(_download_chunk(chunk, period, interval))
+                except Exception as e:
+                    logger.warning("History download failed for %d tickers (%s...): %s", len(chunk), chunk[0], e)
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames)
+
+    @staticmethod
+    def fetch_statements_many(tickers: list, quarterly: bool = False, max_workers: int = 8,
+                              limiter: RateLimiter = None, stale_ok: bool = True) -> dict:
+        """
+        Fetches the three financial statements for many tickers on a bounded worker pool.
+
+        Statements already in the disk cache are served without touching Yahoo;
+        upstream requests are throttled by `limiter` and sent at bulk priority.
+
+        Args:
+            tickers: Stock tickers (duplicates are ignored).
+            quarterly: Whether to fetch quarterly data instead of annual.
+            max_workers: Number of concurrent fetches.
+            limiter: Rate limiter for upstream requests (defaults to bulk_rate_limiter).
+            stale_ok: Whether stale cached statements may be returned while they refresh in the
+                background; False re-fetches them first (for one-shot batch runs).
+
+        Returns:
+            Dict mapping 'financials', 'balance_sheet' and 'cashflow' to a DataFrame
+            indexed by (Ticker, Date) with one column per line item.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        limiter = limiter or bulk_rate_limiter
+
+        def load(symbol):
+            ticker = _yf().Ticker(symbol)
+            out = {}
+            with priority(BULK):
+                for statement in STATEMENTS:
+                    try:
+                        out[statement] = _statement(symbol, statement, quarterly, ticker, limiter, stale_ok)
+                    except Exception as e:
+                        logger.warning("Could not fetch %s for %s: %s", statement, symbol, e)
+            return symbol, out
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = dict(pool.map(load, tickers))
+
+        combined = {}
+        for statement in STATEMENTS:
+            frames = {
+                symbol: out[statement]
+                for symbol, out in results.items()
+                if statement in out and not out[statement].empty
+            }
+            combined[statement] = pd.concat(frames, names=["Ticker", "Date"]) if frames else pd.DataFrame()
+        return combined
+
+    @staticmethod
+    def warm(ticker_symbol: str, period: str = "5y", interval: str = "1d", limiter: RateLimiter = None) -> dict:
+        """
+        Loads everything a page view reads for a ticker into the shared disk cache:
+        annual and quarterly statements, info and price history. Missing or stale
+        entries are fetched, at bulk priority, before returning rather than revalidated
+        in the background.
+
+        Args:
+            ticker_symbol: The stock ticker.
+            period: History period to cover; shorter periods are served as slices of it.
+            interval: History interval.
+            limiter: Rate limiter for upstream requests (defaults to bulk_rate_limiter).
+
+        Returns:
+            {'upstream_requests': upstream requests made, retries included (0 if all was fresh), 'failed': datasets that could not be loaded}.
+        """
+        limiter = limiter or bulk_rate_limiter
+        ticker = _yf().Ticker(ticker_symbol)
+        loaders = {}
+        for quarterly in (False, True):
+            for statement in STATEMENTS:
+                name = f"{'quarterly_' if quarterly else ''}{statement}"
+                loaders[name] = (lambda s=statement, q=quarterly:
+                                 _statement(ticker_symbol, s, q, ticker, limiter, stale_ok=False))
+        loaders["info"] = lambda: _info(ticker_symbol, ticker, limiter, stale_ok=False)
+
+        def history():
+            # history_store has no limiter hook, so take one token per ticker
+            limiter.acquire()
+            return history_store.get(ticker_symbol, period=period, interval=interval, stale_ok=False)
+        loaders["history"] = history
+
+        failed = []
+        with upstream.tracking(upstream.CallCounter()) as calls, priority(BULK):
+            for name, load in loaders.items():
+                try:
+                    load()
+                except Exception as e:
+                    logger.warning("Could not warm %s for %s: %s", name, ticker_symbol, e)
+                    failed.append(name)
+        return {"upstream_requests": calls.total, "failed": failed}
+
+    @staticmethod
+    def update_archive(ticker_symbol: str, interval: str = "1m") -> int:
+        """
+        Downloads the latest bars and appends the new ones to the local price archive.
+        Run it more often than the interval's maximum period (7 days for 1m) to avoid
+        gaps; `vd-prewarm --archive 1m` does, for the whole universe.
+
+        Returns:
+            Number of bars added.
+        """
+        period = MAX_PERIODS.get(interval, "max")
+        history = flights.do(
+            ("history", ticker_symbol, period, interval),
+            lambda: history_store.get(ticker_symbol, period=period, interval=interval),
+        )
+        return price_archive.append(ticker_symbol, interval, history)
+
+    @staticmethod
+    def archived_history(ticker_symbol: str, start=None, end=None, interval: str = "1m") -> pd.DataFrame:
+        """
+        Slices the local price archive without loading the whole series.
+
+        Args:
+            ticker_symbol: The stock ticker.
+            start: First bar to include (e.g. '2021-03-01'); None for the beginning.
+            end: Last bar to include; None for the latest.
+            interval: Bar interval of the archive.
+
+        Returns:
+            OHLCV DataFrame whose columns are read-only views of the mapped files.
+        """
+        return price_archive.open(ticker_symbol, interval).slice(start, end).to_frame()
+
+    @staticmethod
+    def flight_stats() -> dict:
+        """
+        Issued vs. coalesced fetches since start-up, per kind ('history', 'statement', 'info').
+        """
+        return flights.stats()
+
+    @staticmethod
+    def upstream_stats() -> dict:
+        """
+        Request scheduler state: {'state': circuit 'closed'/'open'/'half_open', 'queued',
+        'classes': per priority class requests and token waits}.
+        """
+        return scheduler.stats()
+
+    @staticmethod
+    def revalidation_stats() -> dict:
+        """
+        Background refreshes of stale entries since start-up:
+        {'scheduled', 'skipped', 'refreshed', 'failed'}.
+        """
+        return revalidator.stats()
+
+    @staticmethod
+    def snapshot(ticker_symbol: str) -> "TickerSnapshot":
+        """
+        Returns a TickerSnapshot to share between all sections of one page render.
+        """
+        return TickerSnapshot(ticker_symbol)
+
+
+class TickerSnapshot:
+    """
+    Everything a page render needs for one ticker, fetched at most once.
+
+    Holds a single yf.Ticker so yfinance's own per-object memoisation is shared,
+    and memoises every dataset so repeated access from different tabs is free.
+    Cross-rerun caching still happens in the StockDataLoader fetchers.
+    """
+
+    def __init__(self, ticker_symbol: str):
+        self.ticker_symbol = ticker_symbol
+        self._ticker = None
+        self._memo = {}
+
+    @property
+    def ticker(self) -> yf.Ticker:
+        if self._ticker is None:
+            self._ticker = _yf().Ticker(self.ticker_symbol)
+        return self._ticker
+
+    def preload(self, datasets, quarterly: bool = False, period: str = "1y", interval: str = "1d"):
+        """
+        Fetches several datasets concurrently (see async_loader.load_all) and memoises them.
+
+        Datasets that fail are left out, so their accessor retries and raises as usual.
+        """
+        from async_loader import load_all  # async_loader imports this module
+
+        keys = {
+            "history": ("history", period, interval),
+            "financials": ("financials", quarterly),
+            "balance_sheet": ("balance_sheet", quarterly),
+            "cashflow": ("cashflow", quarterly),
+            "info": "info",
+            "quote": "quote",
+        }
+        missing = [d for d in datasets if keys[d] not in self._memo]
+        if not missing:
+            return
+        fetched = load_all(self.ticker_symbol, missing, quarterly=quarterly, period=period, interval=interval)
+        for dataset, value in fetched.items():
+            if not isinstance(value, BaseException):
+                self._memo[keys[dataset]] = value
+
+    def _get(self, key, loader):
+        if key not in self._memo:
+            self._memo[key] = loader()
+        return self._memo[key]
+
+    def history(self, period: str = "1y", interval: str = "1d") -> pd.DataFrame:
+        # Served from the compact cache; the frame's columns are read-only views
+        return self._get(("history", period, interval),
+                         lambda: StockDataLoader.fetch_history_compact(self.ticker_symbol, period, interval).to_frame())
+
+    def financials(self, quarterly: bool = False) -> pd.DataFrame:
+        return self._get(("financials", quarterly),
+                         lambda: StockDataLoader.fetch_financials(self.ticker_symbol, quarterly, _ticker=self.ticker))
+
+    def balance_sheet(self, quarterly: bool = False) -> pd.DataFrame:
+        return self._get(("balance_sheet", quarterly),
+                         lambda: StockDataLoader.fetch_balance_sheet(self.ticker_symbol, quarterly, _ticker=self.ticker))
+
+    def cashflow(self, quarterly: bool = False) -> pd.DataFrame:
+        return self._get(("cashflow", quarterly),
+                         lambda: StockDataLoader.fetch_cashflow(self.ticker_symbol, quarterly, _ticker=self.ticker))
+
+    def info(self) -> dict:
+        return self._get("info", lambda: StockDataLoader.fetch_info(self.ticker_symbol, _ticker=self.ticker))
+
+    def company_name(self) -> str:
+        try:
+            info = self.info()
+            return info.get('longName', info.get('shortName', self.ticker_symbol))
+        except Exception:
+            return self.ticker_symbol
+
+    def quote(self) -> dict:
+        """
+        Live price from the shared quote service:
+        {'last_price': float, 'previous_close': float, 'as_of': epoch seconds of the fetch}.
+        """
+        return self._get("quote", lambda: quote_service.get(self.ticker_symbol))
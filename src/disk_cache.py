@@ -0,0 +1,304 @@
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+
+import pandas as pd
+
+# Time-to-live per dataset type, in seconds (the soft TTL: older entries are stale).
+# Intraday bars go stale within minutes; annual statements change a few times a year.
+DEFAULT_TTLS = {
+    "history_intraday": 5 * 60,
+    "history_daily": 60 * 60,
+    "financials_quarterly": 24 * 60 * 60,
+    "financials_annual": 7 * 24 * 60 * 60,
+    "info": 24 * 60 * 60,
+    # Misses expire sooner so a new listing or a transient failure is picked up again
+    "resolution": 7 * 24 * 60 * 60,
+    "resolution_miss": 6 * 60 * 60,
+    # Managed by HistoryStore, which refreshes the tail itself
+    "history_series": None,
+    "history_meta": None,
+}
+
+# How long a stale entry may still be served while it is refreshed in the background
+# (stale-while-revalidate). Past this it is a miss and the caller waits for upstream.
+# Datasets not listed here are never served stale.
+DEFAULT_HARD_TTLS = {
+    "history_intraday": 60 * 60,
+    "history_daily": 3 * 24 * 60 * 60,
+    "financials_quarterly": 30 * 24 * 60 * 60,
+    "financials_annual": 90 * 24 * 60 * 60,
+    "info": 7 * 24 * 60 * 60,
+}
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "vd-financials")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Temp files older than this were left behind by a crashed writer and are swept on eviction
+STALE_TMP_AGE = 60 * 60
+
+
+# Writes between full scans of the cache directory. In between, a write only scans
+# (and evicts) when this process's running total puts the cache over max_bytes.
+EVICT_SCAN_EVERY = 100
+
+
+def history_dataset(interval: str) -> str:
+    """Returns the TTL bucket for a price history interval (e.g. '1m' -> intraday)."""
+    if (interval.endswith("m") and not interval.endswith("mo")) or interval.endswith("h"):
+        return "history_intraday"
+    return "history_daily"
+
+
+def statement_dataset(quarterly: bool) -> str:
+    """Returns the TTL bucket for a financial statement frequency."""
+    return "financials_quarterly" if quarterly else "financials_annual"
+
+
+class DiskCache:
+    """
+    Persistent, content-addressed cache shared by every worker process.
+
+    Entries are stored as one file per key: Parquet for DataFrames, JSON for dicts.
+    Freshness is judged from the file's modification time (write time) and
+    recency-of-use from its access time, which is bumped explicitly on every hit
+    so LRU eviction works regardless of the filesystem's atime mount options.
+    Writes go to a temp file in the same directory followed by os.replace, so
+    concurrent readers never observe a partially written entry.
+
+    An entry is fresh up to its dataset's soft TTL (`ttls`) and stale from then
+    until its hard TTL (`hard_ttls`). get_* only return fresh entries; peek_*
+    also return stale ones, for callers that refresh them in the background.
+    """
+
+    def __init__(self, root: str = None, max_bytes: int = None, ttls: dict = None, hard_ttls: dict = None,
+                 enabled: bool = True):
+        self.root = root or os.environ.get("VD_CACHE_DIR", DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get("VD_CACHE_MAX_MB", DEFAULT_MAX_BYTES / (1024 * 1024))) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.hard_ttls = dict(DEFAULT_HARD_TTLS)
+        if hard_ttls:
+            self.hard_ttls.update(hard_ttls)
+        self.enabled = enabled and os.environ.get("VD_CACHE_DISABLE", "") not in ("1", "true", "yes")
+        # Size of the cache as of the last scan plus this process's writes since (None: not scanned yet)
+        self._approx_bytes = None
+        self._writes = 0
+        self._evict_lock = threading.Lock()
+        if self.enabled:
+            try:
+                os.makedirs(self.root, exist_ok=True)
+            except OSError:
+                self.enabled = False
+
+    @staticmethod
+    def make_key(dataset: str, **params) -> str:
+        """
+        Builds a stable content-address for a dataset request.
+
+        Args:
+            dataset: Dataset type (e.g. 'history_daily', 'info').
+            **params: Request parameters such as ticker, period, interval.
+
+        Returns:
+            Hex digest identifying the entry.
+        """
+        payload = json.dumps({"dataset": dataset, **params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.root, f"{key}.{ext}")
+
+    def _state(self, path: str, dataset: str):
+        """Returns 'fresh', 'stale', 'expired' (past the hard TTL) or None if missing."""
+        try:
+            age = time.time() - os.stat(path).st_mtime
+        except OSError:
+            return None
+        ttl = self.ttls.get(dataset)
+        if ttl is None or age <= ttl:
+            return "fresh"
+        hard_ttl = self.hard_ttls.get(dataset)
+        if hard_ttl is not None and age <= max(ttl, hard_ttl):
+            return "stale"
+        return "expired"
+
+    def _touch(self, path: str):
+        # Record the access for LRU while preserving mtime (used for TTL)
+        try:
+            mtime = os.stat(path).st_mtime
+            os.utime(path, (time.time(), mtime))
+        except OSError:
+            pass
+
+    def _read(self, path: str, dataset: str, loader, accept: tuple):
+        if not self.enabled:
+            return None, False
+        state = self._state(path, dataset)
+        if state not in accept:
+            return None, False
+        try:
+            value = loader(path)
+        except Exception:
+            return None, False
+        self._touch(path)
+        return value, state == "fresh"
+
+    @staticmethod
+    def _load_json(path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def get_frame(self, dataset: str, **params):
+        """Returns a cached DataFrame, or None if missing or expired."""
+        path = self._path(self.make_key(dataset, **params), "parquet")
+        return self._read(path, dataset, pd.read_parquet, ("fresh",))[0]
+
+    def get_json(self, dataset: str, **params):
+        """Returns a cached JSON object, or None if missing or expired."""
+        path = self._path(self.make_key(dataset, **params), "json")
+        return self._read(path, dataset, self._load_json, ("fresh",))[0]
+
+    def peek_frame(self, dataset: str, expired_ok: bool = False, **params) -> tuple:
+        """
+        Returns (DataFrame, fresh): the entry if it is within its hard TTL, and
+        whether it is still within its soft TTL. (None, False) on a miss.
+        With expired_ok, entries past the hard TTL are returned too (e.g. while
+        upstream is down and anything beats an error).
+        """
+        path = self._path(self.make_key(dataset, **params), "parquet")
+        accept = ("fresh", "stale", "expired") if expired_ok else ("fresh", "stale")
+        return self._read(path, dataset, pd.read_parquet, accept)
+
+    def peek_json(self, dataset: str, expired_ok: bool = False, **params) -> tuple:
+        """Returns (JSON object, fresh), like peek_frame."""
+        path = self._path(self.make_key(dataset, **params), "json")
+        accept = ("fresh", "stale", "expired") if expired_ok else ("fresh", "stale")
+        return self._read(path, dataset, self._load_json, accept)
+
+    def _atomic_write(self, path: str, writer) -> int:
+        """Writes a file via a temp file and os.replace; returns its size."""
+        tmp_path = os.path.join(self.root, f".tmp-{secrets.token_hex(8)}")
+        # Not mkstemp, which creates 0600 files: entries must stay readable by app
+        # processes running as another user, so let the umask decide as open() would
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                writer(f)
+                size = f.tell()
+            os.replace(tmp_path, path)
+            return size
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def set_frame(self, dataset: str, df: pd.DataFrame, **params):
+        """
+        Stores a DataFrame. Empty frames are not stored, so a transient upstream
+        failure is not pinned for a whole TTL. Failures are swallowed: the cache
+        is best-effort.
+        """
+        if not self.enabled or df is None or df.empty:
+            return
+        path = self._path(self.make_key(dataset, **params), "parquet")
+        try:
+            size = self._atomic_write(path, lambda f: df.to_parquet(f))
+        except Exception:
+            return
+        self._wrote(size)
+
+    def set_json(self, dataset: str, value, **params):
+        """Stores a JSON-serialisable object. Failures are swallowed."""
+        if not self.enabled or value is None:
+            return
+        path = self._path(self.make_key(dataset, **params), "json")
+        try:
+            data = json.dumps(value, default=str).encode("utf-8")
+            self._atomic_write(path, lambda f: f.write(data))
+        except Exception:
+            return
+        self._wrote(len(data))
+
+    def _wrote(self, size: int):
+        """Evicts after a write when the running size total or the write count calls for it."""
+        with self._evict_lock:
+            self._writes += 1
+            if self._approx_bytes is not None:
+                # Overwrites are counted twice, which only brings the next scan forward
+                self._approx_bytes += size
+            if (self._approx_bytes is not None and self._approx_bytes <= self.max_bytes
+                    and self._writes < EVICT_SCAN_EVERY):
+                return
+            self._writes = 0
+        total = self._evict()
+        with self._evict_lock:
+            self._approx_bytes = total
+
+    def _evict(self):
+        """
+        Deletes least-recently-used entries until the cache fits in max_bytes,
+        and temp files abandoned by writers that crashed before their os.replace.
+
+        Returns:
+            Bytes left in the cache, or None if the directory could not be read.
+        """
+        entries = []
+        total = 0
+        now = time.time()
+        try:
+            with os.scandir(self.root) as it:
+                for entry in it:
+                    if not entry.is_file():
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    if entry.name.startswith(".tmp-"):
+                        # Recent ones may still be being written by another worker
+                        if now - stat.st_mtime > STALE_TMP_AGE:
+                            try:
+                                os.remove(entry.path)
+                            except OSError:
+                                pass
+                        continue
+                    entries.append((stat.st_atime, stat.st_size, entry.path))
+                    total += stat.st_size
+        except OSError:
+            return None
+        if total <= self.max_bytes:
+            return total
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                # Another worker may have evicted it already
+                continue
+        return total
+
+    def clear(self):
+        """Removes every cached entry."""
+        if not self.enabled:
+            return
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if entry.is_file():
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+        with self._evict_lock:
+            self._approx_bytes = None
@@ -0,0 +1,123 @@
+"""
+Server-side downsampling for price charts.
+
+A chart cannot show more points than it has pixels, so sending every bar of a
+multi-year or intraday series only inflates the figure JSON and slows the
+browser. Candles are merged into OHLC buckets (open of the first bar, high/low
+over the bucket, close of the last, summed volume); line overlays are reduced
+with Largest-Triangle-Three-Buckets, which keeps the visually significant
+peaks and troughs. Both target a point budget derived from the chart width,
+so figure size stays roughly constant whatever the period.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+
+
+def point_budget(width_px: int, px_per_point: float = 1.0) -> int:
+    """
+    Number of points worth sending for a chart of the given width.
+
+    Args:
+        width_px: Plot width in pixels.
+        px_per_point: Pixels each point should get (candles need ~2-3 to be legible).
+    """
+    return max(2, int(width_px / px_per_point))
+
+
+@timed
+def ohlc_buckets(data: pd.DataFrame, max_bars: int) -> pd.DataFrame:
+    """
+    Merges consecutive bars so that at most max_bars remain.
+
+    Args:
+        data: History with Open/High/Low/Close (and optionally Volume) columns.
+        max_bars: Point budget for the candles.
+
+    Returns:
+        DataFrame with the same columns, each row covering `ceil(len/max_bars)` bars
+        and labelled with the first bar's timestamp. Returned unchanged if it already fits.
+    """
+    n = len(data)
+    if n <= max_bars:
+        return data
+    size = math.ceil(n / max_bars)
+    starts = np.arange(0, n, size)
+    ends = np.minimum(starts + size, n) - 1
+
+    out = {}
+    for name in data.columns:
+        values = data[name].to_numpy(dtype=np.float64)
+        if name == "Open":
+            out[name] = values[starts]
+        elif name == "Close":
+            out[name] = values[ends]
+        elif name == "High":
+            out[name] = np.fmax.reduceat(values, starts)
+        elif name == "Low":
+            out[name] = np.fmin.reduceat(values, starts)
+        else:
+            # Volume, and any other per-bar amounts (e.g. Dividends), add up
+            out[name] = np.add.reduceat(np.nan_to_num(values), starts)
+    return pd.DataFrame(out, index=data.index[starts])
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets point selection.
+
+    Args:
+        x: Ascending x values (e.g. int64 timestamps as float).
+        y: Values at x, without NaNs.
+        threshold: Number of points to keep (>= 3).
+
+    Returns:
+        Sorted indices of the kept points; always includes the first and last point.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Interior points are split into threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # The third vertex is the average of the next bucket (the last point for the final one)
+        if i + 2 < len(edges):
+            nlo, nhi = edges[i + 1], edges[i + 2]
+            avg_x = x[nlo:nhi].mean()
+            avg_y = y[nlo:nhi].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        bx = x[lo:hi]
+        by = y[lo:hi]
+        area = np.abs((x[a] - avg_x) * (by - y[a]) - (x[a] - bx) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+@timed
+def lttb(series: pd.Series, threshold: int) -> pd.Series:
+    """
+    Downsamples a line overlay (e.g. SMA) to at most `threshold` points with LTTB.
+
+    NaNs (such as an indicator's warm-up window) are dropped first.
+    """
+    series = series.dropna()
+    if len(series) <= threshold:
+        return series
+    index = series.index
+    if isinstance(index, pd.DatetimeIndex):
+        x = index.asi8.astype(np.float64)
+    else:
+        x = np.arange(len(series), dtype=np.float64)
+    keep = lttb_indices(x, series.to_numpy(dtype=np.float64), threshold)
+    return series.iloc[keep]
@@ -0,0 +1,354 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from disk_cache import DiskCache, history_dataset
+from revalidate import Revalidator
+from scheduler import RequestScheduler, UpstreamUnavailable
+
+logger = logging.getLogger(__name__)
+
+# Bars re-requested before the last stored bar, to pick up late revisions
+OVERLAP = {
+    "history_daily": pd.Timedelta(days=7),
+    "history_intraday": pd.Timedelta(hours=2),
+}
+
+# Relative change in an overlapping close that signals a split/dividend re-adjustment
+REVISION_TOLERANCE = 1e-4
+
+# Seconds a failed tail refresh is not retried while the stored series is still servable
+REFRESH_BACKOFF = 60.0
+
+# Longest period yfinance serves per intraday interval. Older bars are dropped from
+# stored series, and a tail longer than this is re-downloaded as a whole.
+MAX_PERIODS = {"1m": "7d", "2m": "60d", "5m": "60d", "15m": "60d", "30m": "60d", "60m": "730d", "90m": "60d",
+               "1h": "730d"}
+
+# Calendar slack added to 'Nd' periods so weekends/holidays are covered
+TRADING_DAY_SLACK = pd.Timedelta(days=4)
+
+
+def period_start(period: str, now: pd.Timestamp):
+    """
+    Converts a yfinance period string into the earliest timestamp it needs.
+
+    Args:
+        period: yfinance period (e.g. '5d', '6mo', '2y', 'ytd', 'max').
+        now: Reference time (tz-aware).
+
+    Returns:
+        Timestamp, or None for 'max'.
+    """
+    if period == "max":
+        return None
+    if period == "ytd":
+        return pd.Timestamp(year=now.year, month=1, day=1, tz=now.tz)
+    if period.endswith("mo"):
+        return now - pd.DateOffset(months=int(period[:-2]))
+    if period.endswith("y"):
+        return now - pd.DateOffset(years=int(period[:-1]))
+    if period.endswith("d"):
+        return now - pd.Timedelta(days=int(period[:-1])) - TRADING_DAY_SLACK
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def max_span(interval: str):
+    """How far back upstream serves bars of an interval, as a Timedelta (None if unlimited)."""
+    period = MAX_PERIODS.get(interval)
+    return pd.Timedelta(days=int(period[:-1])) if period is not None else None
+
+
+def _align_tz(ts: pd.Timestamp, index: pd.DatetimeIndex) -> pd.Timestamp:
+    if index.tz is None:
+        return ts.tz_localize(None) if ts.tz is not None else ts
+    return ts.tz_convert(index.tz)
+
+
+def _slice(series: pd.DataFrame, period: str, start) -> pd.DataFrame:
+    """Returns the part of a stored series that a period request would have returned."""
+    if series.empty or start is None:
+        return series.copy()
+    if period.endswith("d") and not period.endswith("ytd") and period != "max":
+        # yfinance counts 'Nd' in trading days, so keep the last N distinct dates
+        days = series.index.normalize().unique()
+        first_day = days[-int(period[:-1]):][0]
+        return series[series.index >= first_day].copy()
+    return series[series.index >= _align_tz(start, series.index)].copy()
+
+
+def _merge(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """Overlays new bars on stored ones; where both exist the new bars win."""
+    if old is None or old.empty:
+        return new
+    if new.empty:
+        return old
+    return pd.concat([old[old.index < new.index[0]], new, old[old.index > new.index[-1]]])
+
+
+def _no_prices(exc: Exception) -> bool:
+    """Whether yfinance raised because the symbol has no prices (unknown, delisted, none in range)."""
+    if any(cls.__name__ == "YFTickerMissingError" for cls in type(exc).__mro__):
+        return True
+    # Older releases raise plain exceptions ("No data found, symbol may be delisted")
+    return "delisted" in str(exc)
+
+
+def _trim(entry: dict, interval: str) -> dict:
+    """Drops intraday bars older than upstream serves, so stored series stop growing."""
+    span = max_span(interval)
+    if span is None:
+        return entry
+    cutoff = pd.Timestamp.now(tz="UTC") - span
+    series = entry["series"]
+    start = entry["start"]
+    if start is None or pd.Timestamp(start) < cutoff:
+        start = str(cutoff)
+    return {**entry, "series": series[series.index >= _align_tz(cutoff, series.index)], "start": start}
+
+
+def _covers(start_meta, start) -> bool:
+    if start_meta is None:
+        return True # 'max' already fetched
+    if start is None:
+        return False
+    return start >= pd.Timestamp(start_meta)
+
+
+class HistoryStore:
+    """
+    Keeps one price series per (ticker, interval) and serves any period as a slice.
+
+    On refresh only the bars after the last stored one are requested (plus a small
+    overlap). If the overlapping bars changed, e.g. after a split re-adjusted the
+    whole history, the stored range is re-downloaded in full.
+
+    With a revalidator, a series past its TTL but within the disk cache's hard
+    TTL is served as is while the tail refresh runs in the background.
+
+    Intraday series only keep the bars upstream still serves (MAX_PERIODS).
+
+    A failed refresh serves the stored series if it is within the hard TTL (or
+    upstream is down) and is not retried for REFRESH_BACKOFF seconds; otherwise
+    the error is raised.
+    """
+
+    def __init__(self, disk_cache: DiskCache = None, max_entries: int = 64, revalidator: Revalidator = None,
+                 scheduler: RequestScheduler = None):
+        self.disk_cache = disk_cache or DiskCache(enabled=False)
+        self.max_entries = max_entries
+        self.revalidator = revalidator
+        self.scheduler = scheduler or RequestScheduler()
+        self._entries = OrderedDict()
+        # Guards _entries itself; stale reads use it without taking the per-key fetch lock
+        self._entries_lock = threading.Lock()
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        # key -> time of the last failed tail refresh
+        self._failed_at = {}
+
+    def _lock_for(self, key) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _ttl(self, interval: str) -> float:
+        return self.disk_cache.ttls[history_dataset(interval)]
+
+    def _hard_ttl(self, interval: str) -> float:
+        return self.disk_cache.hard_ttls.get(history_dataset(interval))
+
+    def _servable(self, entry: dict, interval: str) -> bool:
+        """Whether a stored series may still be served when its refresh fails."""
+        hard_ttl = self._hard_ttl(interval)
+        return hard_ttl is not None and time.time() - entry["refreshed"] <= hard_ttl
+
+    def _backing_off(self, key, entry: dict) -> bool:
+        failed_at = self._failed_at.get(key)
+        return (failed_at is not None and time.time() - failed_at < REFRESH_BACKOFF
+                and self._servable(entry, key[1]))
+
+    def _remember(self, key, entry: dict):
+        with self._entries_lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _load(self, key):
+        """Returns the freshest known entry from memory or the shared disk cache."""
+        ticker_symbol, interval = key
+        with self._entries_lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry["refreshed"] <= self._ttl(interval):
+                self._entries.move_to_end(key)
+                return entry
+        # Another worker may have refreshed it in the meantime
+        meta = self.disk_cache.get_json("history_meta", ticker=ticker_symbol, interval=interval)
+        if meta is not None and (entry is None or meta["refreshed"] > entry["refreshed"]):
+            series = self.disk_cache.get_frame("history_series", ticker=ticker_symbol, interval=interval)
+            if series is not None:
+                entry = {"series": series, "start": meta["start"], "refreshed": meta["refreshed"]}
+                self._remember(key, entry)
+        return entry
+
+    def _store(self, key, entry: dict):
+        ticker_symbol, interval = key
+        self._remember(key, entry)
+        # Series first: a reader that sees the new meta must also see the new bars
+        self.disk_cache.set_frame("history_series", entry["series"], ticker=ticker_symbol, interval=interval)
+        self.disk_cache.set_json(
+            "history_meta",
+            {"start": entry["start"], "refreshed": entry["refreshed"]},
+            ticker=ticker_symbol,
+            interval=interval,
+        )
+
+    def _download(self, ticker_symbol: str, interval: str, period: str = None, start=None) -> pd.DataFrame:
+        import yfinance as yf  # deferred to first download to keep startup fast
+
+        ticker = yf.Ticker(ticker_symbol)
+        span = {"start": start} if start is not None else {"period": period}
+
+        def fetch():
+            # Without raise_errors, failed requests (429, 5xx) come back as an empty
+            # frame and are never retried nor counted by the circuit breaker
+            try:
+                return ticker.history(interval=interval, raise_errors=True, **span)
+            except Exception as e:
+                if _no_prices(e):
+                    return pd.DataFrame()
+                raise
+
+        return self.scheduler.call("history", fetch)
+
+    def _fetch_full(self, key, period: str, start, entry) -> dict:
+        ticker_symbol, interval = key
+        history = self._download(ticker_symbol, interval, period=period)
+        if history.empty:
+            return entry
+        old_start = entry["start"] if entry is not None else None
+        if start is None or (entry is not None and old_start is None):
+            new_start = None
+        else:
+            new_start = str(min(start, pd.Timestamp(old_start))) if old_start is not None else str(start)
+        new_entry = _trim({
+            "series": _merge(entry["series"] if entry is not None else None, history),
+            "start": new_start,
+            "refreshed": time.time(),
+        }, interval)
+        self._store(key, new_entry)
+        return new_entry
+
+    def _refresh_tail(self, key, entry: dict) -> dict:
+        ticker_symbol, interval = key
+        try:
+            series = self._fetch_tail(key, entry)
+        except Exception as e:
+            # While upstream is down, anything stored beats an error
+            if not (self._servable(entry, interval) or isinstance(e, UpstreamUnavailable)):
+                raise
+            self._failed_at[key] = time.time()
+            logger.warning("Refreshing %s %s history failed; serving stored bars for %.0fs: %s",
+                           ticker_symbol, interval, REFRESH_BACKOFF, e)
+            return entry
+        self._failed_at.pop(key, None)
+        entry = _trim({"series": series, "start": entry["start"], "refreshed": time.time()}, interval)
+        self._store(key, entry)
+        return entry
+
+    def _fetch_tail(self, key, entry: dict) -> pd.DataFrame:
+        """Downloads the bars after the stored ones and returns the updated series."""
+        ticker_symbol, interval = key
+        series = entry["series"]
+        fetch_start = series.index[-1] - OVERLAP[history_dataset(interval)]
+        span = max_span(interval)
+        if span is not None and pd.Timestamp.now(tz="UTC") - fetch_start >= span:
+            # More than one request's worth of intraday bars is missing
+            return _merge(series, self._download_range(key, entry))
+        tail = self._download(ticker_symbol, interval, start=fetch_start)
+        if tail.empty:
+            # The request overlaps stored bars, so an empty answer is a failed request
+            raise RuntimeError(f"No {interval} bars for {ticker_symbol} since {fetch_start}")
+        if self._revised(series, tail):
+            full = self._download_range(key, entry)
+            return full if not full.empty else _merge(series, tail)
+        return _merge(series, tail)
+
+    def _download_range(self, key, entry: dict) -> pd.DataFrame:
+        """Downloads the whole stored range again (for intraday, as much as upstream serves)."""
+        ticker_symbol, interval = key
+        if interval in MAX_PERIODS:
+            return self._download(ticker_symbol, interval, period=MAX_PERIODS[interval])
+        if entry["start"] is None:
+            return self._download(ticker_symbol, interval, period="max")
+        return self._download(ticker_symbol, interval, start=pd.Timestamp(entry["start"]))
+
+    def _revalidate(self, key):
+        with self._lock_for(key):
+            entry = self._load(key)
+            # A foreground call may have refreshed it (or just failed to) while this was queued
+            if (entry is not None and time.time() - entry["refreshed"] > self._ttl(key[1])
+                    and not self._backing_off(key, entry)):
+                self._refresh_tail(key, entry)
+
+    @staticmethod
+    def _revised(series: pd.DataFrame, tail: pd.DataFrame) -> bool:
+        """Detects corporate actions that re-adjust bars before the overlap window."""
+        if "Stock Splits" in tail.columns and (tail["Stock Splits"].fillna(0) != 0).any():
+            return True
+        common = series.index.intersection(tail.index)
+        if len(common) == 0 or "Close" not in series.columns:
+            return False
+        old = series.loc[common, "Close"]
+        new = tail.loc[common, "Close"]
+        # The latest bar is still forming, so only compare closed ones
+        old, new = old.iloc[:-1], new.iloc[:-1]
+        if old.empty:
+            return False
+        rel = ((new - old).abs() / old.abs()).max()
+        return bool(rel > REVISION_TOLERANCE)
+
+    def get(self, ticker_symbol: str, period: str = "1y", interval: str = "1d", stale_ok: bool = True) -> pd.DataFrame:
+        """
+        Returns price history for a period, downloading only what is missing.
+
+        Args:
+            ticker_symbol: The stock ticker (e.g., 'AAPL').
+            period: The data period (e.g., '1y', '5y', 'max').
+            interval: The data interval (e.g., '1d', '1m').
+            stale_ok: Whether a stale series may be served while it refreshes in the background.
+
+        Returns:
+            DataFrame containing historical data.
+        """
+        key = (ticker_symbol, interval)
+        now = pd.Timestamp.now(tz="UTC")
+        start = period_start(period, now)
+        span = max_span(interval)
+        if span is not None and (start is None or start < now - span):
+            # Upstream has nothing older, and stored series are trimmed to the same span
+            start = now - span
+        if self.revalidator is not None and stale_ok:
+            # Without the lock, so a background refresh of this key never blocks readers
+            entry = self._load(key)
+            if entry is not None and _covers(entry["start"], start):
+                age = time.time() - entry["refreshed"]
+                hard_ttl = self._hard_ttl(interval)
+                if age <= self._ttl(interval):
+                    return _slice(entry["series"], period, start)
+                if hard_ttl is not None and age <= hard_ttl:
+                    self.revalidator.submit(("history", ticker_symbol, interval), lambda: self._revalidate(key))
+                    return _slice(entry["series"], period, start)
+
+        with self._lock_for(key):
+            entry = self._load(key)
+            if entry is None or not _covers(entry["start"], start):
+                entry = self._fetch_full(key, period, start, entry)
+                if entry is None:
+                    return pd.DataFrame()
+            elif time.time() - entry["refreshed"] > self._ttl(interval) and not self._backing_off(key, entry):
+                entry = self._refresh_tail(key, entry)
+            return _slice(entry["series"], period, start)
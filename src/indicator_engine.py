@@ -0,0 +1,194 @@
+"""
+Vectorized technical indicators for many tickers at once.
+
+Takes a wide close-price matrix (rows = dates, columns = tickers) and computes
+the indicators from analysis.py for every column in NumPy, sharing the rolling
+sums between SMA and Bollinger Bands. Results follow the pandas semantics of the
+single-ticker functions (min_periods=window, ewm(adjust=False), RSI on simple
+rolling means) up to floating-point rounding.
+"""
+import numpy as np
+import pandas as pd
+
+ALL_INDICATORS = ("sma", "ema", "rsi", "bollinger")
+
+# Rows per step of the blocked EMA scan
+_EMA_BLOCK = 128
+
+
+def close_matrix(history: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts long-format history indexed by (Ticker, Date), as returned by
+    StockDataLoader.fetch_history_many, into a Date x Ticker close matrix.
+    """
+    return history["Close"].unstack(level="Ticker").sort_index()
+
+
+def _rolling_sums(values: np.ndarray, window: int, squares: bool = False):
+    """
+    Rolling sum (and optionally sum of squares) over axis 0 with NaN-aware counts.
+
+    Returns:
+        (sum, sum_sq or None, count) arrays of the same shape as values; rows before a
+        full window have count < window.
+    """
+    valid = ~np.isnan(values)
+    x = np.where(valid, values, 0.0)
+
+    def windowed(a):
+        c = np.cumsum(a, axis=0)
+        out = c.copy()
+        out[window:] -= c[:-window]
+        return out
+
+    sum_sq = windowed(x * x) if squares else None
+    return windowed(x), sum_sq, windowed(valid.astype(np.int64))
+
+
+def _ema_dense(values: np.ndarray, first: np.ndarray, alpha: float) -> np.ndarray:
+    """EMA (adjust=False) for columns with no gaps after their first valid value."""
+    n, k = values.shape
+    x = values.copy()
+    rows = np.arange(n)[:, None]
+    leading = rows < first[None, :]
+    # Seeding with the first value makes y[first] == x[first], matching pandas
+    x = np.where(leading, x[first, np.arange(k)][None, :], x)
+
+    decay = 1.0 - alpha
+    b = min(_EMA_BLOCK, n)
+    idx = np.arange(b)
+    lag = idx[:, None] - idx[None, :]
+    kernel = np.where(lag >= 0, alpha * decay ** np.clip(lag, 0, None), 0.0)
+    carry = decay ** (idx + 1)
+
+    out = np.empty_like(x)
+    prev = x[0].copy()
+    for start in range(0, n, b):
+        block = x[start:start + b]
+        m = len(block)
+        y = kernel[:m, :m] @ block + carry[:m, None] * prev[None, :]
+        out[start:start + m] = y
+        prev = y[-1]
+    out[leading] = np.nan
+    return out
+
+
+def _ema_gappy(values: np.ndarray, alpha: float) -> np.ndarray:
+    """EMA (adjust=False, ignore_na=False) following pandas' handling of missing values."""
+    n = values.shape[0]
+    decay = 1.0 - alpha
+    out = np.empty_like(values)
+    weighted = values[0].copy()
+    old_wt = np.ones(values.shape[1])
+    out[0] = weighted
+    for i in range(1, n):
+        cur = values[i]
+        obs = ~np.isnan(cur)
+        has = ~np.isnan(weighted)
+        old_wt = np.where(has, old_wt * decay, old_wt)
+        upd = has & obs
+        weighted = np.where(upd, (old_wt * weighted + alpha * cur) / (old_wt + alpha), weighted)
+        weighted = np.where(~has & obs, cur, weighted)
+        old_wt = np.where(obs, 1.0, old_wt)
+        out[i] = weighted
+    return out
+
+
+def _ema(values: np.ndarray, window: int) -> np.ndarray:
+    alpha = 2.0 / (window + 1.0)
+    n, k = values.shape
+    out = np.full_like(values, np.nan)
+    valid = ~np.isnan(values)
+    has_any = valid.any(axis=0)
+    first = valid.argmax(axis=0)
+    after_first = np.arange(n)[:, None] >= first[None, :]
+    gappy = (after_first & ~valid).any(axis=0) & has_any
+    dense = has_any & ~gappy
+    if dense.any():
+        out[:, dense] = _ema_dense(values[:, dense], first[dense], alpha)
+    if gappy.any():
+        out[:, gappy] = _ema_gappy(values[:, gappy], alpha)
+    return out
+
+
+def compute_indicators(
+    closes: pd.DataFrame,
+    indicators=ALL_INDICATORS,
+    sma_window: int = 20,
+    ema_window: int = 20,
+    rsi_window: int = 14,
+    bb_window: int = 20,
+    bb_std: float = 2.0,
+) -> dict:
+    """
+    Computes technical indicators for every column of a close-price matrix.
+
+    Args:
+        closes: DataFrame of closes, rows = dates, columns = tickers.
+        indicators: Any of 'sma', 'ema', 'rsi', 'bollinger'.
+        sma_window: Window for the SMA.
+        ema_window: Span for the EMA.
+        rsi_window: Window for the RSI.
+        bb_window: Window for the Bollinger Bands.
+        bb_std: Band width in standard deviations.
+
+    Returns:
+        Dictionary of DataFrames shaped like `closes`, keyed by 'sma', 'ema', 'rsi',
+        'bb_upper' and 'bb_lower' (only for the requested indicators).
+    """
+    unknown = set(indicators) - set(ALL_INDICATORS)
+    if unknown:
+        raise ValueError(f"Unknown indicators: {sorted(unknown)}")
+
+    values = closes.to_numpy(dtype=np.float64)
+    # Shift each column by its first close: rolling sums stay small, so the
+    # running-sum differences lose less precision. Means are shifted back below.
+    offset = closes.bfill().iloc[0].fillna(0.0).to_numpy(dtype=np.float64) if len(closes) else np.zeros(values.shape[1])
+    centered = values - offset[None, :]
+
+    def frame(a):
+        return pd.DataFrame(a, index=closes.index, columns=closes.columns)
+
+    results = {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sums = {}
+
+        def sums_for(window, squares):
+            cached = sums.get(window)
+            if cached is None or (squares and cached[1] is None):
+                cached = _rolling_sums(centered, window, squares)
+                sums[window] = cached
+            return cached
+
+        if "sma" in indicators:
+            s, _, count = sums_for(sma_window, "bollinger" in indicators and bb_window == sma_window)
+            sma = np.where(count == sma_window, s / sma_window, np.nan) + offset[None, :]
+            results["sma"] = frame(sma)
+
+        if "bollinger" in indicators:
+            s, s2, count = sums_for(bb_window, True)
+            full = count == bb_window
+            mean = s / bb_window
+            var = (s2 - s * mean) / (bb_window - 1)
+            std = np.sqrt(np.clip(var, 0.0, None))
+            mid = np.where(full, mean, np.nan) + offset[None, :]
+            std = np.where(full, std, np.nan)
+            results["bb_upper"] = frame(mid + std * bb_std)
+            results["bb_lower"] = frame(mid - std * bb_std)
+
+        if "ema" in indicators:
+            results["ema"] = frame(_ema(values, ema_window))
+
+        if "rsi" in indicators:
+            delta = np.full_like(values, np.nan)
+            delta[1:] = values[1:] - values[:-1]
+            # Like Series.where(delta > 0, 0): missing deltas count as zero moves
+            gain = np.where(delta > 0, delta, 0.0)
+            loss = np.where(delta < 0, -delta, 0.0)
+            g, _, count = _rolling_sums(gain, rsi_window)
+            l, _, _ = _rolling_sums(loss, rsi_window)
+            rs = g / l
+            rsi = 100 - (100 / (1 + rs))
+            results["rsi"] = frame(np.where(count == rsi_window, rsi, np.nan))
+
+    return results
@@ -0,0 +1,301 @@
+"""
+Per-rerun timing spans, cache hit/miss counters and optional profiling.
+
+Everything is off unless switched on through the environment:
+
+    VD_TRACE_FILE=spans.jsonl   append every span as a JSON line (tagged with its rerun)
+    VD_METRICS_PORT=9464        serve Prometheus text metrics at http://localhost:9464/metrics
+    VD_PROFILE_DIR=profiles/    write a cProfile dump of every rerun (open with pstats or snakeviz)
+
+Spans cover the StockDataLoader fetchers (via caching.cache_data), every
+upstream request (via the scheduler), the analysis functions and the app's
+render sections. When tracing is off, span() hands back one shared no-op
+context manager, section() returns at once and timed() leaves functions
+undecorated, so instrumented code costs next to nothing.
+"""
+import cProfile
+import functools
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import upstream
+
+logger = logging.getLogger(__name__)
+
+TRACE_FILE = os.environ.get("VD_TRACE_FILE")
+METRICS_PORT = os.environ.get("VD_METRICS_PORT")
+PROFILE_DIR = os.environ.get("VD_PROFILE_DIR")
+# Read once at import: decorators applied while disabled stay out of the way for good
+ENABLED = bool(TRACE_FILE or METRICS_PORT)
+
+_NOOP = nullcontext()
+_local = threading.local()
+_lock = threading.Lock()
+_write_lock = threading.Lock()
+_reruns = itertools.count(1)
+_span_totals = defaultdict(lambda: [0, 0.0])  # name -> [count, seconds]
+_cache_counts = defaultdict(int)  # (function, 'hit' | 'miss') -> count
+
+
+class Rerun:
+    """Spans recorded during one execution of the app script."""
+
+    def __init__(self, label: str = None):
+        self.id = f"{os.getpid()}-{next(_reruns)}"
+        self.label = label
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        self.spans = []
+        self.section = None
+        self.profiler = None
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "start")
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, self.start, time.perf_counter() - self.start, self.attrs)
+        return False
+
+
+def _record(name: str, start: float, duration: float, attrs: dict):
+    with _lock:
+        totals = _span_totals[name]
+        totals[0] += 1
+        totals[1] += duration
+    rerun = getattr(_local, "rerun", None)
+    if rerun is not None:
+        # list.append is atomic, so worker threads attached to the rerun can add spans too
+        rerun.spans.append({
+            "name": name,
+            "offset": round(start - rerun.start, 6),
+            "duration": round(duration, 6),
+            "thread": threading.current_thread().name,
+            **attrs,
+        })
+
+
+def span(name: str, **attrs):
+    """
+    Times the enclosed block.
+
+    Args:
+        name: Span name, dotted by area (e.g. 'statements.styler').
+        **attrs: Extra JSON-serialisable fields stored with the span.
+    """
+    if not ENABLED:
+        return _NOOP
+    return _Span(name, attrs)
+
+
+def timed(func=None, *, name: str = None):
+    """
+    Decorator recording a span for every call, named '<module>.<function>' by default.
+    Returns the function unchanged when tracing is off.
+    """
+    def decorate(f):
+        if not ENABLED:
+            return f
+        span_name = name or f"{f.__module__}.{f.__qualname__}"
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            with _Span(span_name, {}):
+                return f(*args, **kwargs)
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
+
+
+def section(name: str):
+    """
+    Ends the current render section of this rerun and starts the next one.
+
+    Sections split a long, flat Streamlit script into consecutive timed parts
+    without re-indenting it; the last one ends with end_rerun().
+    """
+    if not ENABLED:
+        return
+    rerun = getattr(_local, "rerun", None)
+    if rerun is None:
+        return
+    now = time.perf_counter()
+    if rerun.section is not None:
+        previous, started = rerun.section
+        _record(previous, started, now - started, {})
+    rerun.section = (name, now)
+
+
+def count_cache(function: str, hit: bool):
+    """Counts one call of a cached function as a hit or a miss."""
+    with _lock:
+        _cache_counts[(function, "hit" if hit else "miss")] += 1
+
+
+def begin_rerun(label: str = None) -> Rerun:
+    """
+    Starts collecting spans (and, with VD_PROFILE_DIR, a profile) for a rerun on this thread.
+
+    Pair it with end_rerun() in a finally block (or use rerun_scope()): st.stop()
+    and st.rerun() end the script with an exception, and Streamlit runs every
+    rerun on a new thread, so an unfinished rerun is never picked up later.
+    """
+    if getattr(_local, "rerun", None) is not None:
+        end_rerun()
+    if not ENABLED and not PROFILE_DIR:
+        return None
+    rerun = Rerun(label)
+    if PROFILE_DIR:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            rerun.profiler = profiler
+        except ValueError:
+            # Another session's rerun is being profiled (one profiler at a time on 3.12+)
+            pass
+    _local.rerun = rerun
+    return rerun
+
+
+def end_rerun() -> dict:
+    """
+    Finishes the rerun on this thread: exports its spans and writes its profile.
+
+    Returns:
+        {'rerun', 'seconds', 'spans'}, or None if no rerun was active.
+    """
+    rerun = getattr(_local, "rerun", None)
+    if rerun is None:
+        return None
+    if rerun.profiler is not None:
+        # First, so a failure below cannot leave the process-wide profiler slot taken
+        rerun.profiler.disable()
+    seconds = time.perf_counter() - rerun.start
+    if ENABLED:
+        if rerun.section is not None:
+            name, started = rerun.section
+            _record(name, started, time.perf_counter() - started, {})
+        _record("rerun", rerun.start, seconds, {})
+    _local.rerun = None
+
+    if rerun.profiler is not None:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        rerun.profiler.dump_stats(os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}_{rerun.id}.prof"))
+    if not ENABLED:
+        return None
+
+    if TRACE_FILE:
+        lines = "".join(
+            json.dumps({"rerun": rerun.id, "label": rerun.label, "time": rerun.wall_start, **s}, default=str) + "\n"
+            for s in rerun.spans
+        )
+        with _write_lock, open(TRACE_FILE, "a", encoding="utf-8") as f:
+            f.write(lines)
+    return {"rerun": rerun.id, "seconds": seconds, "spans": rerun.spans}
+
+
+@contextmanager
+def rerun_scope(label: str = None):
+    """
+    Runs the block (or, as a decorator, the function) as one rerun, ended even when
+    st.stop() cuts it short.
+
+    Inside an active rerun, e.g. a @st.fragment function called during a full
+    rerun, the block is only a span; run on its own, as when a fragment reruns,
+    it is a rerun of its own.
+    """
+    if getattr(_local, "rerun", None) is not None:
+        with span(label or "rerun"):
+            yield
+        return
+    begin_rerun(label)
+    try:
+        yield
+    finally:
+        end_rerun()
+
+
+def current() -> Rerun:
+    """Returns the rerun active on this thread, or None."""
+    return getattr(_local, "rerun", None)
+
+
+@contextmanager
+def attach(rerun: Rerun):
+    """Records spans made on this thread into `rerun` (e.g. a worker fetching for a render)."""
+    previous = getattr(_local, "rerun", None)
+    _local.rerun = rerun
+    try:
+        yield rerun
+    finally:
+        _local.rerun = previous
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def metrics_text() -> str:
+    """Prometheus text exposition of span totals, cache counters and upstream requests."""
+    with _lock:
+        spans = {name: tuple(v) for name, v in _span_totals.items()}
+        caches = dict(_cache_counts)
+    lines = ["# HELP vd_span_seconds Time spent in instrumented spans.", "# TYPE vd_span_seconds summary"]
+    for name, (count, total) in sorted(spans.items()):
+        lines.append(f'vd_span_seconds_count{{name="{_label(name)}"}} {count}')
+        lines.append(f'vd_span_seconds_sum{{name="{_label(name)}"}} {total:.6f}')
+    lines += ["# HELP vd_cache_requests_total Calls of cached fetchers by result.",
+              "# TYPE vd_cache_requests_total counter"]
+    for (function, result), count in sorted(caches.items()):
+        lines.append(f'vd_cache_requests_total{{function="{_label(function)}",result="{result}"}} {count}')
+    lines += ["# HELP vd_upstream_requests_total Requests sent to Yahoo Finance by kind.",
+              "# TYPE vd_upstream_requests_total counter"]
+    for kind, count in sorted(upstream.totals().items()):
+        lines.append(f'vd_upstream_requests_total{{kind="{_label(kind)}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int):
+    """Serves /metrics on a daemon thread. A port already in use (another worker) is logged and skipped."""
+    try:
+        server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+    except OSError as e:
+        logger.warning("Metrics endpoint not started on port %d: %s", port, e)
+        return None
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+
+if METRICS_PORT:
+    start_metrics_server(int(METRICS_PORT))
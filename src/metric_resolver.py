@@ -0,0 +1,110 @@
+"""
+Maps logical metrics (e.g. 'revenue') to the line-item columns of a statement.
+
+yfinance line-item names vary between companies and API versions, so each metric
+has an ordered list of aliases, and the first alias that names a column (ignoring
+case, whitespace and punctuation) wins. Resolution is deterministic and independent
+of column order.
+
+Only the listed aliases match. Looser matching picks up qualified line items
+('Revenue' in 'Cost Of Revenue', 'Net Income' in 'Net Income Discontinuous
+Operations'), so a new naming variant is added to the table instead.
+
+Resolvers are cached per set of column names, so computing metrics for many
+ticker-periods with the same schema costs one index build.
+"""
+import re
+from functools import lru_cache
+
+# Ordered aliases per metric, most specific first
+METRIC_ALIASES = {
+    # Income Statement
+    "revenue": ("Total Revenue", "Revenue", "Operating Revenue"),
+    "cost_of_revenue": ("Cost Of Revenue",),
+    "gross_profit": ("Gross Profit",),
+    "operating_income": ("Operating Income",),
+    "net_income": ("Net Income", "Net Income Common Stockholders",
+                   "Net Income From Continuing Operation Net Minority Interest"),
+    "ebitda": ("EBITDA", "Normalized EBITDA"),
+    "ebit": ("EBIT",),
+    "interest_expense": ("Interest Expense", "Interest Expense Non Operating"),
+    "research_development": ("Research And Development",),
+    "sga": ("Selling General And Administration",),
+    "diluted_eps": ("Diluted EPS",),
+    "basic_eps": ("Basic EPS",),
+    "shares": ("Diluted Average Shares", "Basic Average Shares"),
+    # Balance Sheet
+    "stockholders_equity": ("Stockholders Equity", "Total Stockholder Equity", "Common Stock Equity"),
+    "total_assets": ("Total Assets",),
+    "current_assets": ("Current Assets", "Total Current Assets"),
+    "current_liabilities": ("Current Liabilities", "Total Current Liabilities"),
+    "inventory": ("Inventory",),
+    "total_debt": ("Total Debt",),
+    "receivables": ("Receivables", "Accounts Receivable"),
+    # Cash Flow
+    "operating_cash_flow": ("Operating Cash Flow", "Total Cash From Operating Activities"),
+    "capex": ("Capital Expenditure", "Capital Expenditures"),
+}
+
+_WORD = re.compile(r"[a-z0-9&]+")
+
+
+def _words(name: str) -> tuple:
+    return tuple(_WORD.findall(str(name).lower()))
+
+
+class ColumnResolver:
+    """Normalized index over one statement schema."""
+
+    def __init__(self, columns):
+        self.columns = sorted(columns, key=lambda c: (len(str(c)), str(c)))
+        self._exact = {}
+        for c in self.columns:
+            self._exact.setdefault(_words(c), c)
+        self._memo = {}
+
+    def candidates(self, aliases) -> tuple:
+        """
+        All matching columns, in alias order.
+
+        Args:
+            aliases: Ordered candidate names, or a key of METRIC_ALIASES.
+        """
+        aliases = METRIC_ALIASES.get(aliases, (aliases,)) if isinstance(aliases, str) else tuple(aliases)
+        if aliases in self._memo:
+            return self._memo[aliases]
+        found = (self._exact.get(_words(alias)) for alias in aliases)
+        result = tuple(dict.fromkeys(c for c in found if c is not None))
+        self._memo[aliases] = result
+        return result
+
+    def resolve(self, aliases) -> str:
+        """
+        Args:
+            aliases: Ordered candidate names, or a key of METRIC_ALIASES.
+
+        Returns:
+            The matching column, or None.
+        """
+        found = self.candidates(aliases)
+        return found[0] if found else None
+
+
+@lru_cache(maxsize=512)
+def _resolver_for(columns: frozenset) -> ColumnResolver:
+    return ColumnResolver(columns)
+
+
+def column_resolver(columns) -> ColumnResolver:
+    """Returns the shared resolver for a set of column names."""
+    return _resolver_for(frozenset(columns))
+
+
+def resolve_column(columns, aliases):
+    """
+    Finds the column for a metric key (e.g. 'revenue') or an ordered alias list.
+
+    Returns:
+        The matching column name, or None if the statement has no such line item.
+    """
+    return column_resolver(columns).resolve(aliases)
@@ -0,0 +1,147 @@
+"""
+Pre-warms the shared disk cache for a universe of tickers.
+
+Every app process reads through the disk cache, so running this ahead of market
+open means the first viewer of the day gets annual and quarterly statements,
+info and daily history from disk instead of waiting on Yahoo. Entries that
+are still fresh are left alone, so re-running it is cheap.
+
+With --archive, it also appends the latest intraday bars to the local price
+archive, which keeps minute history beyond the few days yfinance serves. Run
+daily, that leaves no gaps.
+
+    vd-prewarm                                 # universe.txt at the repo root
+    vd-prewarm --universe my_names.txt --workers 16 --rate 20
+    vd-prewarm --archive 1m --archive 1h       # also archive minute and hourly bars
+
+Scheduled with cron, e.g. weekdays before the Stockholm/Copenhagen open:
+
+    30 7 * * 1-5  /srv/vd-financials/vd-prewarm -q --archive 1m --report /var/log/vd-prewarm.jsonl
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Allow running as a script (python src/prewarm.py) as well as through the entry point
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import upstream
+from cli import read_tickers
+from data_loader import StockDataLoader
+from history_store import MAX_PERIODS
+from rate_limit import RateLimiter
+from scheduler import BULK, priority
+from ticker_resolver import EXCHANGES
+
+logger = logging.getLogger("vd-prewarm")
+
+# Exchange suffixes a universe entry may already carry
+SUFFIXES = tuple(s for _, s in EXCHANGES if s)
+
+DEFAULT_UNIVERSE = os.environ.get(
+    "VD_UNIVERSE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "universe.txt")
+)
+
+
+def _warm_one(symbol: str, period: str, limiter: RateLimiter, archive: tuple = ()) -> tuple:
+    # Resolver probes and archive updates count towards the ticker's upstream requests too
+    with upstream.tracking(upstream.CallCounter()) as calls:
+        if symbol.endswith(SUFFIXES):
+            # Already a listing (e.g. 'ERIC-B.ST'); probing 'ERIC-B.ST.ST' etc. would only cache misses
+            resolved = symbol
+        else:
+            # Resolve like the app's Auto-Detect does, which also caches the resolution.
+            # The resolver has no limiter hook, so take one token per ticker for its probes.
+            limiter.acquire()
+            with priority(BULK):
+                resolved = StockDataLoader.resolve_ticker(symbol)
+            if resolved is None:
+                if "." not in symbol:
+                    return symbol, None, {"upstream_requests": calls.total, "failed": ["resolution"]}
+                resolved = symbol
+        result = StockDataLoader.warm(resolved, period=period, limiter=limiter)
+        for interval in archive:
+            limiter.acquire()
+            try:
+                with priority(BULK):
+                    StockDataLoader.update_archive(resolved, interval)
+            except Exception as e:
+                logger.warning("Could not archive %s bars for %s: %s", interval, resolved, e)
+                result["failed"].append(f"archive_{interval}")
+    result["upstream_requests"] += calls.total
+    return symbol, resolved, result
+
+
+def prewarm(symbols: list, period: str = "5y", workers: int = 8, rate: float = 10.0, archive: tuple = ()) -> dict:
+    """
+    Warms every symbol on a bounded thread pool, sharing one rate limiter.
+
+    Args:
+        symbols: Tickers as users type them (bare or with an exchange suffix).
+        period: Daily history period to cover.
+        workers: Tickers warmed concurrently.
+        rate: Upstream requests per second.
+        archive: Intraday intervals (e.g. '1m') whose latest bars are appended to the price archive.
+
+    Returns:
+        Report with 'tickers', 'upstream_requests' (retries included), 'failed' ({symbol: [datasets]}) and 'seconds'.
+    """
+    limiter = RateLimiter(rate=rate, burst=max(1, int(rate)))
+    start = time.monotonic()
+    requests = 0
+    failed = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_warm_one, s, period, limiter, tuple(archive)) for s in symbols]
+        for done, future in enumerate(as_completed(futures), 1):
+            symbol, resolved, result = future.result()
+            requests += result["upstream_requests"]
+            if result["failed"]:
+                failed[symbol] = result["failed"]
+            logger.info("[%d/%d] %s%s: %d upstream requests%s", done, len(symbols), symbol,
+                        f" -> {resolved}" if resolved not in (None, symbol) else "", result["upstream_requests"],
+                        f", failed: {', '.join(result['failed'])}" if result["failed"] else "")
+    return {
+        "tickers": len(symbols),
+        "upstream_requests": requests,
+        "failed": failed,
+        "seconds": round(time.monotonic() - start, 1),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="vd-prewarm", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--universe", default=DEFAULT_UNIVERSE, help="File with one ticker per line")
+    parser.add_argument("--period", default="5y", help="Daily history period to cover (default: 5y)")
+    parser.add_argument("--workers", type=int, default=8, help="Tickers warmed concurrently")
+    parser.add_argument("--rate", type=float, default=10.0, help="Upstream requests per second")
+    parser.add_argument("--archive", action="append", default=[], choices=sorted(MAX_PERIODS), metavar="INTERVAL",
+                        help="Also append the latest bars of this intraday interval to the price archive (repeatable)")
+    parser.add_argument("--report", help="Append the run's report as one JSON line to this file")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only report the summary")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO, format="%(message)s")
+
+    symbols = list(dict.fromkeys(read_tickers(args.universe)))
+    if not symbols:
+        parser.error(f"no tickers in {args.universe}")
+
+    report = prewarm(symbols, period=args.period, workers=args.workers, rate=args.rate, archive=args.archive)
+    logger.warning("Warmed %d tickers: %d upstream requests, %d tickers with failures, in %.1fs",
+                   report["tickers"], report["upstream_requests"], len(report["failed"]), report["seconds"])
+    if report["failed"]:
+        logger.warning("Failed: %s", ", ".join(f"{s} ({', '.join(d)})" for s, d in sorted(report["failed"].items())))
+
+    if args.report:
+        with open(args.report, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"time": time.time(), **report}) + "\n")
+    return 2 if len(report["failed"]) == len(symbols) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+Local, append-only archive of price bars for long intraday histories.
+
+yfinance only returns a few days of minute bars per call, so the archive keeps
+appending what fetch_history returns. Each (interval, symbol) series is a
+directory of fixed-width column files plus a small meta.json:
+
+    <root>/<interval>/<symbol>/timestamps.bin   int64 epoch seconds (UTC), ascending
+    <root>/<interval>/<symbol>/Open.bin         float32 (likewise High, Low, Close)
+    <root>/<interval>/<symbol>/Volume.bin       int64
+    <root>/<interval>/<symbol>/meta.json        {"length": n, "tz": "America/New_York"}
+
+Reads memory-map the files, so opening a multi-year series costs a few
+milliseconds and pages are only loaded for the date range actually sliced.
+meta.json is replaced after the column files are written, so readers never see
+a partially appended bar; leftover bytes from an interrupted append are
+truncated by the next one. The archive expects one writer per series.
+"""
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from compact_history import CompactHistory
+
+DEFAULT_ARCHIVE_DIR = os.path.join(os.path.expanduser("~"), ".local", "share", "vd-financials", "archive")
+
+# Stored columns and their on-disk dtypes (little-endian)
+COLUMNS = {
+    "Open": np.dtype("<f4"),
+    "High": np.dtype("<f4"),
+    "Low": np.dtype("<f4"),
+    "Close": np.dtype("<f4"),
+    "Volume": np.dtype("<i8"),
+}
+TIMESTAMP_DTYPE = np.dtype("<i8")
+
+
+class ArchivedSeries:
+    """Memory-mapped view of one archived series."""
+
+    def __init__(self, timestamps: np.ndarray, columns: dict, tz: str = None):
+        self.timestamps = timestamps
+        self.columns = columns
+        self.tz = tz
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def _bound(self, when, side: str) -> int:
+        ts = pd.Timestamp(when)
+        if ts.tz is None and self.tz is not None:
+            ts = ts.tz_localize(self.tz)
+        # .value is nanoseconds since the epoch in UTC
+        return int(np.searchsorted(self.timestamps, ts.value // 10**9, side=side))
+
+    def slice(self, start=None, end=None) -> CompactHistory:
+        """
+        Bars with start <= timestamp <= end, as zero-copy views of the mapped files.
+
+        Args:
+            start: Anything pd.Timestamp accepts; naive values are read in the series' timezone.
+            end: Inclusive upper bound, same format.
+
+        Returns:
+            CompactHistory over the range; .to_frame() gives a DataFrame without copying.
+        """
+        lo = self._bound(start, "left") if start is not None else 0
+        hi = self._bound(end, "right") if end is not None else len(self)
+        return CompactHistory(
+            np.asarray(self.timestamps[lo:hi]),
+            {name: np.asarray(values[lo:hi]) for name, values in self.columns.items()},
+            self.tz,
+        )
+
+
+class PriceArchive:
+    """Per-symbol memory-mapped bar archive (see module docstring for the layout)."""
+
+    def __init__(self, root: str = None):
+        self.root = root or os.environ.get("VD_ARCHIVE_DIR", DEFAULT_ARCHIVE_DIR)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _dir(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, interval, symbol)
+
+    def _lock_for(self, key) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _read_meta(self, directory: str) -> dict:
+        try:
+            with open(os.path.join(directory, "meta.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"length": 0, "tz": None}
+
+    def _write_meta(self, directory: str, meta: dict):
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(directory, "meta.json"))
+
+    def append(self, symbol: str, interval: str, history: pd.DataFrame) -> int:
+        """
+        Appends the bars of a history frame that are newer than the archive's last bar.
+
+        Earlier bars are ignored, so overlapping downloads can be appended as-is;
+        revisions of already archived bars are not applied.
+
+        Args:
+            symbol: The stock ticker.
+            interval: Bar interval (e.g. '1m').
+            history: Frame as returned by StockDataLoader.fetch_history.
+
+        Returns:
+            Number of bars added.
+        """
+        if history.empty:
+            return 0
+        compact = CompactHistory.from_frame(history.sort_index())
+        directory = self._dir(symbol, interval)
+        with self._lock_for((symbol, interval)):
+            os.makedirs(directory, exist_ok=True)
+            meta = self._read_meta(directory)
+            length = meta["length"]
+
+            keep = slice(0, len(compact))
+            if length:
+                last = self.open(symbol, interval).timestamps[-1]
+                keep = slice(int(np.searchsorted(compact.timestamps, last, side="right")), len(compact))
+            timestamps = compact.timestamps[keep]
+            if not len(timestamps):
+                return 0
+
+            files = {"timestamps": (TIMESTAMP_DTYPE, timestamps)}
+            for name, dtype in COLUMNS.items():
+                values = compact.columns.get(name)
+                if values is None:
+                    values = np.zeros(len(compact))
+                files[name] = (dtype, values[keep])
+
+            for name, (dtype, values) in files.items():
+                with open(os.path.join(directory, f"{name}.bin"), "ab") as f:
+                    # Drop bytes left over from an interrupted append
+                    f.truncate(length * dtype.itemsize)
+                    f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+
+            self._write_meta(directory, {"length": length + len(timestamps), "tz": meta["tz"] or compact.tz})
+            return len(timestamps)
+
+    def open(self, symbol: str, interval: str) -> ArchivedSeries:
+        """
+        Maps an archived series without reading it.
+
+        Returns:
+            ArchivedSeries, empty if nothing has been archived for the symbol.
+        """
+        directory = self._dir(symbol, interval)
+        meta = self._read_meta(directory)
+        length = meta["length"]
+
+        def mapped(name, dtype):
+            if not length:
+                return np.empty(0, dtype=dtype)
+            return np.memmap(os.path.join(directory, f"{name}.bin"), dtype=dtype, mode="r", shape=(length,))
+
+        columns = {name: mapped(name, dtype) for name, dtype in COLUMNS.items()}
+        return ArchivedSeries(mapped("timestamps", TIMESTAMP_DTYPE), columns, meta["tz"])
+
+    def symbols(self, interval: str) -> list:
+        """Symbols with an archive for the interval."""
+        try:
+            return sorted(os.listdir(os.path.join(self.root, interval)))
+        except OSError:
+            return []
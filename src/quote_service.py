@@ -0,0 +1,134 @@
+"""
+Process-wide live quotes shared by every session.
+
+Sessions read quotes from one in-memory table instead of polling Yahoo
+themselves. A background poller refreshes all symbols viewed recently with a
+single batched request per interval, so upstream load grows with the number of
+distinct symbols on screen rather than the number of sessions. Every quote
+carries the time it was fetched so the UI can show how stale it is.
+"""
+import logging
+import threading
+import time
+
+from scheduler import BACKGROUND, priority
+
+logger = logging.getLogger(__name__)
+
+
+class QuoteService:
+    """
+    Shared quote table with batched background polling.
+
+    Args:
+        fetch: Callable taking a list of symbols and returning
+            {symbol: {'last_price': float, 'previous_close': float}} in one upstream request.
+        interval: Seconds between polls.
+        idle_after: Symbols not requested for this many seconds are no longer polled.
+        max_age: Quotes older than this are refreshed synchronously on read
+            (e.g. when the poller has gone idle). Defaults to 3 * interval.
+        miss_ttl: Seconds a symbol the upstream returned no quote for is answered
+            with KeyError without fetching again. Defaults to interval.
+    """
+
+    def __init__(self, fetch, interval: float = 15.0, idle_after: float = 120.0, max_age: float = None,
+                 miss_ttl: float = None):
+        self.fetch = fetch
+        self.interval = interval
+        self.idle_after = idle_after
+        self.max_age = max_age if max_age is not None else 3 * interval
+        self.miss_ttl = miss_ttl if miss_ttl is not None else interval
+        self._quotes = {}
+        # Symbol -> epoch time of the last fetch that returned no quote for it
+        self._misses = {}
+        self._watched = {}
+        self._lock = threading.Lock()
+        # Serialises upstream requests so concurrent first reads share one fetch
+        self._fetch_lock = threading.Lock()
+        self._poller = None
+
+    def get(self, symbol: str) -> dict:
+        """
+        Returns the latest quote for a symbol and keeps it on the poll list.
+
+        Returns:
+            {'last_price', 'previous_close', 'as_of'} where as_of is the epoch time
+            of the upstream fetch. Raises KeyError if the symbol has no quote.
+        """
+        now = time.time()
+        with self._lock:
+            self._watched[symbol] = now
+            quote = self._quotes.get(symbol)
+            missed = quote is None and now - self._misses.get(symbol, float("-inf")) <= self.miss_ttl
+            self._ensure_poller()
+        if missed:
+            # Known miss (e.g. a delisted symbol); the poller keeps checking it in the background
+            raise KeyError(f"No quote for {symbol}")
+        if quote is None or now - quote["as_of"] > self.max_age:
+            self._refresh([symbol], max_age=self.max_age)
+            with self._lock:
+                quote = self._quotes.get(symbol)
+        if quote is None:
+            raise KeyError(f"No quote for {symbol}")
+        return dict(quote)
+
+    def age(self, symbol: str) -> float:
+        """Seconds since the symbol's quote was fetched, or None if there is none."""
+        with self._lock:
+            quote = self._quotes.get(symbol)
+        return time.time() - quote["as_of"] if quote else None
+
+    def watched(self) -> list:
+        """Symbols requested within the last idle_after seconds."""
+        cutoff = time.time() - self.idle_after
+        with self._lock:
+            return sorted(s for s, seen in self._watched.items() if seen >= cutoff)
+
+    def _refresh(self, symbols: list, max_age: float = None):
+        with self._fetch_lock:
+            if max_age is not None:
+                # Another thread may have fetched these while we waited for the lock
+                now = time.time()
+                with self._lock:
+                    symbols = [s for s in symbols
+                               if (s not in self._quotes or now - self._quotes[s]["as_of"] > max_age)
+                               and now - self._misses.get(s, float("-inf")) > self.miss_ttl]
+            if not symbols:
+                return
+            try:
+                fetched = self.fetch(symbols)
+            except Exception as e:
+                # Keep serving the previous quotes; their as_of shows they are ageing
+                logger.warning("Quote refresh failed for %d symbols: %s", len(symbols), e)
+                return
+            as_of = time.time()
+            with self._lock:
+                for symbol, quote in fetched.items():
+                    self._quotes[symbol] = {**quote, "as_of": as_of}
+                    self._misses.pop(symbol, None)
+                for symbol in symbols:
+                    if symbol not in fetched:
+                        self._misses[symbol] = as_of
+
+    def _ensure_poller(self):
+        # Called with self._lock held
+        if self._poller is None or not self._poller.is_alive():
+            self._poller = threading.Thread(target=self._poll, name="quote-poller", daemon=True)
+            self._poller.start()
+
+    def _poll(self):
+        while True:
+            time.sleep(self.interval)
+            cutoff = time.time() - self.idle_after
+            with self._lock:
+                for symbol in [s for s, seen in self._watched.items() if seen < cutoff]:
+                    del self._watched[symbol]
+                    self._misses.pop(symbol, None)
+                symbols = sorted(self._watched)
+                if not symbols:
+                    # Nobody is watching; the next get() restarts the poller
+                    self._poller = None
+                    return
+            # Polls are refreshes: page loads go first
+            with priority(BACKGROUND):
+                self._refresh(symbols)
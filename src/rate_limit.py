@@ -0,0 +1,54 @@
+import random
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket shared between threads.
+
+    Allows bursts of up to `burst` calls, refilled at `rate` calls per second.
+    """
+
+    def __init__(self, rate: float = 5.0, burst: int = 5):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a call may be made."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def with_retry(func, retries: int = 3, base_delay: float = 1.0, max_delay: float = 30.0, retry_on=None):
+    """
+    Calls func(), retrying failures with exponential backoff and full jitter.
+
+    Args:
+        func: Zero-argument callable.
+        retries: Number of retries after the first attempt.
+        base_delay: Delay before the first retry, in seconds (doubled each time).
+        max_delay: Upper bound on a single delay.
+        retry_on: Optional predicate(exception) -> bool; other exceptions are raised at once.
+
+    Returns:
+        Whatever func returns. The last exception is re-raised if every attempt fails.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except Exception as e:
+            if attempt == retries or (retry_on is not None and not retry_on(e)):
+                raise
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
@@ -0,0 +1,81 @@
+"""
+Stale-while-revalidate: serve an expired cache entry at once and refresh it
+in the background, so a user only waits on Yahoo when nothing usable is cached.
+
+Each cache decides what "stale" means (DiskCache soft/hard TTLs, HistoryStore's
+refresh interval) and hands the refresh to a Revalidator, which runs it on a
+small thread pool. At most one refresh per key is queued or running, and the
+backlog is capped, so a burst of stale hits cannot turn into a burst of
+upstream requests; a skipped refresh is simply retried on the next stale hit.
+"""
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from scheduler import BACKGROUND, priority
+
+logger = logging.getLogger(__name__)
+
+
+class Revalidator:
+    """
+    Runs background cache refreshes with bounded concurrency and one refresh per key.
+    Their upstream requests are scheduled at BACKGROUND priority, behind page loads.
+    """
+
+    def __init__(self, max_concurrent: int = 4, max_pending: int = 64):
+        """
+        Args:
+            max_concurrent: Refreshes running at the same time.
+            max_pending: Refreshes queued or running; further stale hits skip scheduling.
+        """
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="revalidate")
+        self._pending = set()
+        self._lock = threading.Lock()
+        self.counts = Counter()
+
+    def submit(self, key: tuple, func) -> bool:
+        """
+        Schedules func to refresh the entry identified by key.
+
+        Args:
+            key: Hashable entry identity whose first element names the kind (e.g. 'statement').
+            func: Zero-argument callable that re-fetches and stores the entry.
+
+        Returns:
+            True if a refresh was scheduled, False if one is already pending or the backlog is full.
+        """
+        with self._lock:
+            if key in self._pending or len(self._pending) >= self.max_pending:
+                self.counts["skipped"] += 1
+                return False
+            self._pending.add(key)
+            self.counts["scheduled"] += 1
+        self._executor.submit(self._run, key, func)
+        return True
+
+    def _run(self, key: tuple, func):
+        outcome = "failed"
+        try:
+            with priority(BACKGROUND):
+                func()
+            outcome = "refreshed"
+        except Exception as e:
+            # The stale entry stays in place; the next stale hit tries again
+            logger.warning("Background refresh of %s failed: %s", key, e)
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+                self.counts[outcome] += 1
+
+    def pending(self) -> int:
+        """Refreshes queued or running."""
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self) -> dict:
+        """Returns {'scheduled', 'skipped', 'refreshed', 'failed'} counts since start-up."""
+        with self._lock:
+            return {k: self.counts[k] for k in ("scheduled", "skipped", "refreshed", "failed")}
@@ -0,0 +1,228 @@
+"""
+Central scheduler for requests to Yahoo Finance.
+
+Every upstream call goes through RequestScheduler.call, which
+  - takes a token from one process-wide bucket, handing tokens out by priority
+    class so page loads are served before background refreshes and bulk jobs;
+  - retries rate-limit (429), server (5xx) and connection errors with jittered
+    exponential backoff;
+  - trips a circuit breaker after repeated such failures and then fails fast
+    with UpstreamUnavailable, so callers fall back to cached data instead of
+    queueing behind a struggling upstream.
+
+The priority of a call is taken from the calling thread (see `priority`), so
+code deep in the data layer does not need to know who asked for the data.
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import instrumentation
+import upstream
+from rate_limit import with_retry
+
+logger = logging.getLogger(__name__)
+
+# Priority classes; lower values are served first
+INTERACTIVE = 0  # page loads
+BACKGROUND = 1  # stale-while-revalidate refreshes
+BULK = 2  # pre-warming, batch analysis, watchlist loads
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background", BULK: "bulk"}
+
+_local = threading.local()
+
+
+class UpstreamUnavailable(RuntimeError):
+    """Raised without contacting upstream while the circuit breaker is open."""
+
+
+@contextmanager
+def priority(level: int):
+    """Runs upstream calls made on this thread at the given priority class."""
+    previous = getattr(_local, "priority", None)
+    _local.priority = level
+    try:
+        yield
+    finally:
+        _local.priority = previous
+
+
+def current_priority() -> int:
+    """Priority class of calls made on this thread (INTERACTIVE unless set)."""
+    level = getattr(_local, "priority", None)
+    return INTERACTIVE if level is None else level
+
+
+def http_status(exc: Exception):
+    """HTTP status behind an exception raised by yfinance or its HTTP client, or None."""
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None) or getattr(exc, "status_code", None)
+    if status is None and (type(exc).__name__ == "YFRateLimitError" or "Too Many Requests" in str(exc)):
+        return 429
+    return status
+
+
+def is_transient(exc: Exception) -> bool:
+    """Whether a failure is worth retrying: rate limiting, a server error or a connection problem."""
+    status = http_status(exc)
+    if status is not None:
+        return status == 429 or 500 <= status < 600
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    # requests / curl_cffi exceptions do not derive from the builtin ones
+    return any(cls.__name__ in ("ConnectionError", "Timeout") for cls in type(exc).__mro__)
+
+
+class RequestScheduler:
+    """
+    Token bucket with priority classes, retries and a circuit breaker.
+
+    Tokens are refilled at `rate` per second up to `burst`. When callers have to
+    wait, the waiting caller with the lowest (priority, arrival) gets the next
+    token, so a page load arriving behind a queue of bulk requests is next in line.
+    """
+
+    def __init__(self, rate: float = 10.0, burst: int = 20, retries: int = 3, base_delay: float = 1.0,
+                 max_delay: float = 30.0, failure_threshold: int = 5, reset_after: float = 30.0):
+        """
+        Args:
+            rate: Requests per second across the process.
+            burst: Requests that may be made back to back after an idle period.
+            retries: Retries of a transient failure after the first attempt.
+            base_delay: Delay before the first retry, in seconds (doubled each time, with full jitter).
+            max_delay: Upper bound on a single retry delay.
+            failure_threshold: Consecutive transient failures that open the circuit.
+            reset_after: Seconds the circuit stays open before a single trial request is let through.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+
+        self._cond = threading.Condition()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiting = []
+        self._arrivals = itertools.count()
+        self._requests = defaultdict(int)
+        self._wait_total = defaultdict(float)
+        self._wait_max = defaultdict(float)
+
+        self._lock = threading.Lock()
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+
+    def _acquire(self, level: int):
+        """Blocks until this caller is first in line and a token is available."""
+        start = time.monotonic()
+        with self._cond:
+            ticket = (level, next(self._arrivals))
+            heapq.heappush(self._waiting, ticket)
+            # A higher-priority arrival takes over the timed wait from the current head
+            self._cond.notify_all()
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                head = self._waiting[0] == ticket
+                if head and self._tokens >= 1:
+                    heapq.heappop(self._waiting)
+                    self._tokens -= 1
+                    self._cond.notify_all()
+                    break
+                self._cond.wait((1 - self._tokens) / self.rate if head else None)
+            waited = time.monotonic() - start
+            self._requests[level] += 1
+            self._wait_total[level] += waited
+            self._wait_max[level] = max(self._wait_max[level], waited)
+
+    def _before_attempt(self):
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self._opened_at < self.reset_after:
+                    raise UpstreamUnavailable("Yahoo Finance is failing; not retrying yet")
+                self.state = "half_open"
+                self._trial_running = False
+            if self.state == "half_open":
+                if self._trial_running:
+                    raise UpstreamUnavailable("Yahoo Finance is failing; a trial request is in progress")
+                self._trial_running = True
+
+    def _after_attempt(self, failed: bool):
+        with self._lock:
+            self._trial_running = False
+            if not failed:
+                if self.state != "closed":
+                    logger.info("Upstream recovered; circuit closed")
+                self.state = "closed"
+                self._failures = 0
+                return
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning("Upstream failing (%d consecutive errors); circuit open for %.0fs",
+                                   self._failures, self.reset_after)
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+    def call(self, kind: str, func, level: int = None):
+        """
+        Runs one upstream request.
+
+        Args:
+            kind: What is requested (e.g. 'history', 'statement'), for upstream.record.
+            func: Zero-argument callable that makes the request.
+            level: Priority class; defaults to the calling thread's (see `priority`).
+
+        Returns:
+            Whatever func returns.
+
+        Raises:
+            UpstreamUnavailable: The circuit is open; nothing was sent.
+            Exception: func's last error, once retries are exhausted or if it is not transient.
+        """
+        level = current_priority() if level is None else level
+
+        def attempt():
+            self._before_attempt()
+            self._acquire(level)
+            upstream.record(kind)
+            try:
+                result = func()
+            except Exception as e:
+                # Any other error (e.g. an unknown symbol) still means upstream answered
+                self._after_attempt(failed=is_transient(e))
+                raise
+            self._after_attempt(failed=False)
+            return result
+
+        # Includes token waits and retries: what the caller actually waited for
+        with instrumentation.span(f"upstream.{kind}", priority=PRIORITY_NAMES[level]):
+            return with_retry(attempt, self.retries, self.base_delay, self.max_delay, retry_on=is_transient)
+
+    def stats(self) -> dict:
+        """
+        Circuit state and, per priority class, requests sent and seconds spent
+        waiting for a token: {'state', 'queued', 'classes': {name: {...}}}.
+        """
+        with self._cond:
+            classes = {
+                PRIORITY_NAMES[level]: {
+                    "requests": self._requests[level],
+                    "mean_wait": self._wait_total[level] / self._requests[level],
+                    "max_wait": self._wait_max[level],
+                }
+                for level in sorted(self._requests)
+            }
+            queued = len(self._waiting)
+        return {"state": self.state, "queued": queued, "classes": classes}
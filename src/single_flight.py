@@ -0,0 +1,72 @@
+"""
+Request coalescing: concurrent identical fetches share one in-flight call.
+
+st.cache_data only helps once a result is stored, so when many sessions miss
+the same key at once (e.g. at market open) each would otherwise go upstream.
+"""
+import threading
+from collections import Counter
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time; callers arriving while it runs
+    wait for it and receive the same result (or exception).
+
+    Keys are tuples whose first element names the kind of request (e.g.
+    'history'), which is what the issued/coalesced counters are grouped by.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.issued = Counter()
+        self.coalesced = Counter()
+
+    def do(self, key: tuple, func):
+        """
+        Args:
+            key: Hashable request identity, e.g. ('statement', 'AAPL', 'financials', False).
+            func: Zero-argument callable doing the fetch.
+
+        Returns:
+            The result of func, shared between all concurrent callers with this key.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.issued[key[0]] += 1
+            else:
+                self.coalesced[key[0]] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        """Returns {kind: {'issued': n, 'coalesced': m}} since start-up."""
+        with self._lock:
+            kinds = set(self.issued) | set(self.coalesced)
+            return {k: {"issued": self.issued[k], "coalesced": self.coalesced[k]} for k in sorted(kinds)}
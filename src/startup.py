@@ -0,0 +1,72 @@
+"""
+Cold-start timing for the Streamlit app.
+
+Streamlit re-executes app.py on every rerun but imports modules only once per
+process, so the first run is the one that pays for imports. This module times
+those imports and the first render, and emits a single report per process:
+logged at INFO, and appended as a JSON line to $VD_STARTUP_REPORT if set so
+startup regressions can be tracked across deploys.
+"""
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Taken when the app first imports this module, i.e. at the start of the first run
+STARTED = time.perf_counter()
+
+_imports = {}
+_marks = {}
+_reported = False
+
+
+@contextmanager
+def timed_import(name: str):
+    """
+    Times the imports inside the block on their first execution in this process.
+
+    Args:
+        name: Label for the report (usually the module name).
+    """
+    first = name not in _imports
+    start = time.perf_counter()
+    yield
+    if first:
+        _imports[name] = time.perf_counter() - start
+
+
+def mark(event: str):
+    """Records the time since startup of the first occurrence of an event (e.g. 'first_paint')."""
+    _marks.setdefault(event, time.perf_counter() - STARTED)
+
+
+def report() -> dict:
+    """
+    Emits the startup report once per process; later calls return it without re-emitting.
+
+    Returns:
+        Dictionary with 'imports' (seconds per module) and 'marks' (seconds since startup).
+    """
+    global _reported
+    data = {
+        "imports": {name: round(t, 4) for name, t in _imports.items()},
+        "marks": {event: round(t, 4) for event, t in _marks.items()},
+    }
+    if _reported:
+        return data
+    _reported = True
+
+    slowest = sorted(data["imports"].items(), key=lambda kv: kv[1], reverse=True)
+    logger.info(
+        "Startup: %s; imports: %s",
+        ", ".join(f"{event}={t:.3f}s" for event, t in data["marks"].items()),
+        ", ".join(f"{name}={t:.3f}s" for name, t in slowest),
+    )
+    path = os.environ.get("VD_STARTUP_REPORT")
+    if path:
+        with open(path, "a") as f:
+            f.write(json.dumps({"time": time.time(), "pid": os.getpid(), **data}) + "\n")
+    return data
@@ -0,0 +1,106 @@
+"""
+Display-ready frames for the Full Financial Statements view.
+
+Builds everything render_structured_statement needs in one pass: the absolute
+($M) and growth (%) variants, string date labels, and a precomputed style frame
+for the bold key rows. The result is plain data, cached per statement contents,
+so reruns and toggling a variant are lookups.
+"""
+import pandas as pd
+
+from caching import cache_data
+from data_loader import StockDataLoader
+from financial_definitions import INCOME_STATEMENT_STRUCTURE, BALANCE_SHEET_STRUCTURE, CASH_FLOW_STRUCTURE
+from instrumentation import timed
+
+# (Title, StockDataLoader fetch, structure) in display order
+STATEMENTS = [
+    ("Income Statement", StockDataLoader.fetch_financials, INCOME_STATEMENT_STRUCTURE),
+    ("Balance Sheet", StockDataLoader.fetch_balance_sheet, BALANCE_SHEET_STRUCTURE),
+    ("Cash Flow Statement", StockDataLoader.fetch_cashflow, CASH_FLOW_STRUCTURE),
+]
+
+# Rows rendered in bold in every statement
+KEY_ROWS = ["Gross Profit", "Total Revenue", "Net Income", "Operating Income", "EBIT", "EBITDA", "Net Income Common Stockholders"]
+
+BOLD = 'font-weight: bold'
+
+
+def format_date_labels(columns: pd.Index) -> list:
+    """Formats date columns as YYYY-MM-DD strings (other labels via str)."""
+    if isinstance(columns, pd.DatetimeIndex):
+        return list(columns.strftime('%Y-%m-%d'))
+    return [c.strftime('%Y-%m-%d') if hasattr(c, 'strftime') else str(c) for c in columns]
+
+
+@timed
+def build_statement_view(df: pd.DataFrame, structure) -> dict:
+    """
+    Builds the display frames for one statement.
+
+    Args:
+        df: Date-indexed statement as returned by StockDataLoader.
+        structure: Sections from financial_definitions, or None to keep every row.
+
+    Returns:
+        Dictionary with 'absolute' (values in $M), 'growth' (period-over-period %)
+        and 'style' (CSS per cell), all Metrics x Dates with string date labels.
+        The frames are empty if no row of the structure is present.
+    """
+    # StockDataLoader returns Dates as Index (Rows), but we need Metrics as Index for reindexing.
+    df_standard = df.T
+
+    if structure:
+        # Structure is list of tuples (Section, [Metrics]). We need flat list of metrics.
+        flat_metrics = [m for section, metrics in structure for m in metrics]
+        # If metric doesn't exist, reindex adds a NaN row; drop rows that are ALL NaN
+        df_standard = df_standard.reindex(flat_metrics).dropna(how='all', axis=0)
+
+    if df_standard.empty:
+        return {"absolute": df_standard, "growth": df_standard, "style": df_standard}
+
+    # Earliest to Left (Ascending), as in the charts
+    df_standard = df_standard.sort_index(axis=1, ascending=True)
+
+    # Keep columns where we have data for at least 50% of the metrics
+    valid_counts = df_standard.count()
+    keep_cols = valid_counts[valid_counts >= (len(df_standard) * 0.5)].index
+    df_standard = df_standard[keep_cols]
+
+    labels = format_date_labels(df_standard.columns)
+
+    # YoY/QoQ Growth, computed across columns (Oldest -> Newest)
+    growth = df_standard.pct_change(axis=1) * 100
+    growth.columns = labels
+
+    # Scale to Millions
+    absolute = df_standard / 1e6
+    absolute.columns = labels
+
+    style = pd.DataFrame('', index=absolute.index, columns=labels)
+    style.loc[style.index.isin(KEY_ROWS)] = BOLD
+
+    return {"absolute": absolute, "growth": growth, "style": style}
+
+
+@cache_data(ttl=3600)
+def _cached_view(df: pd.DataFrame, title: str) -> dict:
+    # Keyed on the frame's contents (st.cache_data hashes DataFrames), so a statement
+    # refreshed by the fetchers' own caching is rebuilt on the next rerun
+    structure = next(s for t, _, s in STATEMENTS if t == title)
+    return build_statement_view(df, structure)
+
+
+def statement_views(ticker_symbol: str, quarterly: bool = False) -> dict:
+    """
+    Builds the views of all three statements for one ticker and frequency.
+
+    Returns:
+        Dictionary keyed by statement title. Each value is the output of
+        build_statement_view, or None if the statement could not be fetched.
+    """
+    views = {}
+    for title, fetch, _ in STATEMENTS:
+        df = fetch(ticker_symbol, quarterly=quarterly)
+        views[title] = None if df.empty else _cached_view(df, title)
+    return views
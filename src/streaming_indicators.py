@@ -0,0 +1,374 @@
+"""
+Incremental versions of the indicators in analysis.py for live price updates.
+
+Each indicator is seeded once from history and then fed one bar at a time in O(1).
+While a bar is still forming, `revise` replaces its close without advancing the
+window. The update rules mirror the online algorithms pandas uses for
+rolling().mean(), rolling().std() and ewm(adjust=False).mean(), including
+their Kahan-compensated sums. SMA, EMA and RSI match the batch functions bit
+for bit; Bollinger bands match within floating-point tolerance. The rolling
+variance accumulates rounding error differently (around 1e-12 of the squared
+price), which the square root turns into up to about 1e-8 of the price where a
+window's closes barely move: twenty identical closes give a width of exactly 0
+here and ~1e-7 from pandas.
+"""
+import abc
+import math
+from collections import deque
+
+import pandas as pd
+
+
+def _div(a: float, b: float) -> float:
+    """IEEE division (x/0 -> +-inf, 0/0 -> nan) like NumPy, without raising."""
+    if b == 0:
+        if a == 0 or math.isnan(a):
+            return math.nan
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+class _Streaming(abc.ABC):
+    """An indicator fed one close at a time; `value` is the latest result."""
+
+    def __init__(self):
+        self._undo = None
+        self.value = math.nan
+
+    @abc.abstractmethod
+    def update(self, value: float):
+        """Adds a new bar's close and returns the indicator for that bar."""
+
+    @abc.abstractmethod
+    def revise(self, value: float):
+        """Replaces the close of the most recent bar (e.g. a live tick) and returns the new value."""
+
+    def seed(self, data: pd.DataFrame):
+        """Feeds every close in a history DataFrame (as passed to the batch functions)."""
+        for value in data['Close'].to_numpy(dtype=float):
+            self.update(float(value))
+        return self
+
+
+class _Windowed(_Streaming):
+    """Window bookkeeping for indicators over the last `window` closes: push a bar, or revise the last one."""
+
+    def __init__(self, window: int):
+        super().__init__()
+        self.window = window
+        self._values = deque()
+
+    @abc.abstractmethod
+    def _scalars(self) -> tuple:
+        """State to restore when the latest bar is revised."""
+
+    @abc.abstractmethod
+    def _restore(self, scalars: tuple):
+        """Puts back state returned by _scalars()."""
+
+    @abc.abstractmethod
+    def _step(self, value: float, evicted):
+        """Adds `value`, drops `evicted` (None while the window fills) and returns the new value."""
+
+    def update(self, value: float):
+        evicted = self._values.popleft() if len(self._values) == self.window else None
+        self._undo = (self._scalars(), evicted)
+        self._values.append(value)
+        self.value = self._step(value, evicted)
+        return self.value
+
+    def revise(self, value: float):
+        if self._undo is None:
+            return self.update(value)
+        scalars, evicted = self._undo
+        self._restore(scalars)
+        self._values.pop()
+        if evicted is not None:
+            self._values.appendleft(evicted)
+        return self.update(value)
+
+
+class _RollingMean:
+    """pandas' roll_mean state: Kahan-compensated add/remove with artifact guards."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self.nobs = 0
+        self.sum_x = 0.0
+        self.neg_ct = 0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.same_count = 0
+        self.prev_value = math.nan
+
+    def state(self) -> tuple:
+        return (self.nobs, self.sum_x, self.neg_ct, self.comp_add, self.comp_remove, self.same_count, self.prev_value)
+
+    def set_state(self, state: tuple):
+        (self.nobs, self.sum_x, self.neg_ct, self.comp_add, self.comp_remove, self.same_count, self.prev_value) = state
+
+    def add(self, val: float):
+        if val == val:
+            self.nobs += 1
+            y = val - self.comp_add
+            t = self.sum_x + y
+            self.comp_add = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, val) < 0:
+                self.neg_ct += 1
+            if val == self.prev_value:
+                self.same_count += 1
+            else:
+                self.same_count = 1
+            self.prev_value = val
+
+    def remove(self, val: float):
+        if val == val:
+            self.nobs -= 1
+            y = -val - self.comp_remove
+            t = self.sum_x + y
+            self.comp_remove = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, val) < 0:
+                self.neg_ct -= 1
+
+    def step(self, value: float, evicted) -> float:
+        if self.window == 1:
+            # pandas restarts the sum whenever consecutive windows do not overlap
+            self.reset()
+            self.prev_value = value
+            self.same_count = 0
+        elif evicted is not None:
+            self.remove(evicted)
+        self.add(value)
+        return self.mean()
+
+    def mean(self) -> float:
+        if self.nobs >= self.window and self.nobs > 0:
+            result = self.sum_x / self.nobs
+            if self.same_count >= self.nobs:
+                result = self.prev_value
+            elif self.neg_ct == 0 and result < 0:
+                result = 0.0
+            elif self.neg_ct == self.nobs and result > 0:
+                result = 0.0
+            return result
+        return math.nan
+
+
+class _RollingVar:
+    """pandas' roll_var state: Welford's algorithm with Kahan summation (ddof=1)."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self.nobs = 0.0
+        self.mean_x = 0.0
+        self.ssqdm_x = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.same_count = 0
+        self.prev_value = math.nan
+
+    def state(self) -> tuple:
+        return (self.nobs, self.mean_x, self.ssqdm_x, self.comp_add, self.comp_remove, self.same_count, self.prev_value)
+
+    def set_state(self, state: tuple):
+        (self.nobs, self.mean_x, self.ssqdm_x, self.comp_add, self.comp_remove, self.same_count, self.prev_value) = state
+
+    def add(self, val: float):
+        if val != val:
+            return
+        self.nobs += 1
+        if val == self.prev_value:
+            self.same_count += 1
+        else:
+            self.same_count = 1
+        self.prev_value = val
+        prev_mean = self.mean_x - self.comp_add
+        y = val - self.comp_add
+        t = y - self.mean_x
+        self.comp_add = t + self.mean_x - y
+        delta = t
+        if self.nobs:
+            self.mean_x = self.mean_x + delta / self.nobs
+        else:
+            self.mean_x = 0.0
+        self.ssqdm_x = self.ssqdm_x + (val - prev_mean) * (val - self.mean_x)
+        if self.same_count >= self.nobs:
+            # A window of identical closes has an exact mean and no spread; drop accumulated rounding
+            self.mean_x = val
+            self.ssqdm_x = 0.0
+            self.comp_add = 0.0
+
+    def remove(self, val: float):
+        if val == val:
+            self.nobs -= 1
+            if self.nobs:
+                prev_mean = self.mean_x - self.comp_remove
+                y = val - self.comp_remove
+                t = y - self.mean_x
+                self.comp_remove = t + self.mean_x - y
+                delta = t
+                self.mean_x = self.mean_x - delta / self.nobs
+                self.ssqdm_x = self.ssqdm_x - (val - prev_mean) * (val - self.mean_x)
+            else:
+                self.mean_x = 0.0
+                self.ssqdm_x = 0.0
+
+    def step(self, value: float, evicted) -> float:
+        if self.window == 1:
+            self.reset()
+            self.prev_value = value
+            self.same_count = 0
+        elif evicted is not None:
+            self.remove(evicted)
+        self.add(value)
+        return self.std()
+
+    def std(self) -> float:
+        ddof = 1
+        if self.nobs >= self.window and self.nobs > ddof:
+            if self.nobs == 1 or self.same_count >= self.nobs:
+                var = 0.0
+            else:
+                var = self.ssqdm_x / (self.nobs - ddof)
+        else:
+            return math.nan
+        return math.sqrt(var) if var >= 0 else 0.0
+
+
+class StreamingSMA(_Windowed):
+    """Incremental calculate_sma."""
+
+    def __init__(self, window: int = 20):
+        super().__init__(window)
+        self._mean = _RollingMean(window)
+
+    def _scalars(self):
+        return self._mean.state()
+
+    def _restore(self, scalars):
+        self._mean.set_state(scalars)
+
+    def _step(self, value, evicted):
+        return self._mean.step(value, evicted)
+
+
+class StreamingBollinger(_Windowed):
+    """Incremental calculate_bollinger_bands; `value` is (upper, lower)."""
+
+    def __init__(self, window: int = 20):
+        super().__init__(window)
+        self._mean = _RollingMean(window)
+        self._var = _RollingVar(window)
+        self.value = (math.nan, math.nan)
+
+    def _scalars(self):
+        return (self._mean.state(), self._var.state())
+
+    def _restore(self, scalars):
+        self._mean.set_state(scalars[0])
+        self._var.set_state(scalars[1])
+
+    def _step(self, value, evicted):
+        sma = self._mean.step(value, evicted)
+        std = self._var.step(value, evicted)
+        return sma + (std * 2), sma - (std * 2)
+
+
+class StreamingEMA(_Streaming):
+    """Incremental calculate_ema, i.e. ewm(span=window, adjust=False).mean()."""
+
+    def __init__(self, window: int = 20):
+        # The EMA needs no window of past closes, only the running value
+        super().__init__()
+        com = (window - 1) / 2.0
+        self._alpha = 1.0 / (1.0 + com)
+        self._old_wt_factor = 1.0 - self._alpha
+        self._weighted = math.nan
+        self._old_wt = 1.0
+
+    def update(self, value: float):
+        self._undo = (self._weighted, self._old_wt)
+        self.value = self._step(value)
+        return self.value
+
+    def revise(self, value: float):
+        if self._undo is None:
+            return self.update(value)
+        self._weighted, self._old_wt = self._undo
+        return self.update(value)
+
+    def _step(self, value):
+        weighted = self._weighted
+        if weighted == weighted:
+            # Missing closes still age the running value (ignore_na=False)
+            self._old_wt *= self._old_wt_factor
+            if value == value:
+                # pandas skips the update on constant series to avoid rounding noise
+                if weighted != value:
+                    weighted = self._old_wt * weighted + self._alpha * value
+                    weighted /= (self._old_wt + self._alpha)
+                self._old_wt = 1.0
+        elif value == value:
+            weighted = value
+        self._weighted = weighted
+        return weighted
+
+
+class StreamingRSI(_Streaming):
+    """
+    Incremental calculate_rsi.
+
+    The batch function averages gains and losses with simple rolling means (not
+    Wilder smoothing), so this keeps two rolling means of the same kind.
+    """
+
+    def __init__(self, window: int = 14):
+        super().__init__()
+        self.window = window
+        self._gain = _RollingMean(window)
+        self._loss = _RollingMean(window)
+        self._last_close = math.nan
+        self._moves = deque()
+
+    def _scalars(self):
+        return (self._gain.state(), self._loss.state(), self._last_close)
+
+    def _restore(self, scalars):
+        self._gain.set_state(scalars[0])
+        self._loss.set_state(scalars[1])
+        self._last_close = scalars[2]
+
+    def update(self, value: float):
+        # The window holds (gain, loss) moves rather than closes
+        evicted = self._moves.popleft() if len(self._moves) == self.window else None
+        self._undo = (self._scalars(), evicted)
+        delta = value - self._last_close
+        # Same as Series.where(cond, 0): a missing delta counts as no move,
+        # and negating the zero yields -0.0 for the loss series
+        gain = delta if delta > 0 else 0.0
+        loss = -(delta if delta < 0 else 0.0)
+        self._moves.append((gain, loss))
+        self._last_close = value
+        g = self._gain.step(gain, evicted[0] if evicted else None)
+        l = self._loss.step(loss, evicted[1] if evicted else None)
+        rs = _div(g, l)
+        self.value = 100 - _div(100, 1 + rs)
+        return self.value
+
+    def revise(self, value: float):
+        if self._undo is None:
+            return self.update(value)
+        scalars, evicted = self._undo
+        self._restore(scalars)
+        self._moves.pop()
+        if evicted is not None:
+            self._moves.appendleft(evicted)
+        return self.update(value)
@@ -0,0 +1,113 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import instrumentation
+import upstream
+from disk_cache import DiskCache
+from scheduler import current_priority, priority
+
+logger = logging.getLogger(__name__)
+
+# (Label, Suffix) in Auto-Detect priority order. Adding a listing here makes it
+# available in the sidebar and probes it in parallel with the others.
+EXCHANGES = [
+    ("US (No Suffix)", ""),
+    ("Sweden (.ST)", ".ST"),
+    ("Denmark (.CO)", ".CO"),
+]
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="ticker-resolve")
+
+
+class ResolutionUncertain(RuntimeError):
+    """
+    Raised when failed probes leave a resolution uncertain. `resolved` holds the
+    best answer the successful probes gave (possibly None).
+    """
+
+    def __init__(self, symbol: str, resolved, errors: list):
+        super().__init__(f"{len(errors)} probe(s) for {symbol} failed: {errors[0]}")
+        self.resolved = resolved
+        self.errors = errors
+
+
+def candidates(symbol: str, suffixes=None) -> list:
+    """Returns the symbols to probe, in priority order."""
+    suffixes = suffixes if suffixes is not None else [s for _, s in EXCHANGES]
+    return [f"{symbol}{s}" for s in suffixes]
+
+
+class TickerResolver:
+    """
+    Resolves a bare symbol to the listing that has price data.
+
+    All candidate suffixes are probed concurrently, and the first valid one in
+    priority order wins, so total latency is that of the slowest probe that has
+    to be waited on rather than the sum of all probes. Results, including misses,
+    are remembered in the disk cache; a probe that fails (e.g. rate limited or
+    upstream down) leaves the outcome uncertain, so nothing is remembered and
+    ResolutionUncertain is raised for callers to keep out of their own caches.
+    """
+
+    def __init__(self, probe, disk_cache: DiskCache = None, suffixes=None):
+        """
+        Args:
+            probe: Callable(symbol) -> bool telling whether a listing exists.
+            disk_cache: Where resolutions are persisted.
+            suffixes: Override of the suffixes in EXCHANGES.
+        """
+        self.probe = probe
+        self.disk_cache = disk_cache or DiskCache(enabled=False)
+        self.suffixes = suffixes if suffixes is not None else [s for _, s in EXCHANGES]
+
+    def _probe(self, symbol: str, counter: upstream.CallCounter, rerun, level: int) -> bool:
+        # Probes count their upstream calls and spans towards the caller, at the caller's priority
+        with upstream.tracking(counter), instrumentation.attach(rerun), priority(level):
+            return bool(self.probe(symbol))
+
+    def resolve(self, symbol: str):
+        """
+        Args:
+            symbol: Bare ticker as typed by the user (e.g. 'VOLV-B').
+
+        Returns:
+            The resolved ticker (e.g. 'VOLV-B.ST'), or None if no listing was found.
+
+        Raises:
+            ResolutionUncertain: A probe failed, so a (higher-priority) listing may
+                have been missed. Carries the best answer found anyway.
+        """
+        cands = candidates(symbol, self.suffixes)
+        hit = self.disk_cache.get_json("resolution", symbol=symbol, candidates=cands)
+        if hit is not None:
+            return hit["resolved"]
+        if self.disk_cache.get_json("resolution_miss", symbol=symbol, candidates=cands) is not None:
+            return None
+
+        context = (upstream.current(), instrumentation.current(), current_priority())
+        futures = [_executor.submit(self._probe, c, *context) for c in cands]
+        resolved = None
+        errors = []
+        for cand, future in zip(cands, futures):
+            try:
+                found = future.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+            if found:
+                resolved = cand
+                break
+        # Lower-priority probes still in flight are left to finish in the background
+        for future in futures:
+            future.cancel()
+
+        if errors:
+            # A failed probe may hide a listing (or a higher-priority one): don't remember anything
+            logger.warning("Resolving %s: %d of %d probes failed (%s); not caching the result",
+                           symbol, len(errors), len(cands), errors[0])
+            raise ResolutionUncertain(symbol, resolved, errors)
+        if resolved is not None:
+            self.disk_cache.set_json("resolution", {"resolved": resolved}, symbol=symbol, candidates=cands)
+        else:
+            self.disk_cache.set_json("resolution_miss", {"resolved": None}, symbol=symbol, candidates=cands)
+        return resolved
@@ -0,0 +1,66 @@
+"""Bookkeeping for requests that go out to Yahoo Finance."""
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+_lock = threading.Lock()
+_totals = Counter()
+_local = threading.local()
+
+
+class CallCounter:
+    """Counts upstream calls by kind (e.g. 'info', 'history', 'statement')."""
+
+    def __init__(self):
+        self.counts = Counter()
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def summary(self) -> str:
+        """Returns e.g. 'history=1, info=1' for display."""
+        return ", ".join(f"{k}={v}" for k, v in sorted(self.counts.items())) or "none"
+
+
+def record(kind: str):
+    """Records one upstream call in the process totals and the active tracker, if any."""
+    counter = getattr(_local, "counter", None)
+    with _lock:
+        _totals[kind] += 1
+        # Worker threads may share the counter of the render that spawned them
+        if counter is not None:
+            counter.counts[kind] += 1
+
+
+def start_tracking() -> CallCounter:
+    """
+    Starts counting upstream calls made by the current thread.
+
+    Streamlit runs each rerun of a session on a single script thread, so calling
+    this at the top of the script yields the calls issued by one page render.
+    """
+    _local.counter = CallCounter()
+    return _local.counter
+
+
+def current() -> CallCounter:
+    """Returns the counter active on this thread, or None."""
+    return getattr(_local, "counter", None)
+
+
+@contextmanager
+def tracking(counter: CallCounter):
+    """Counts calls made on this thread towards `counter` (e.g. a worker fetching for a render)."""
+    previous = getattr(_local, "counter", None)
+    _local.counter = counter
+    try:
+        yield counter
+    finally:
+        _local.counter = previous
+
+
+def totals() -> dict:
+    """Returns process-wide upstream call counts since start-up."""
+    with _lock:
+        return dict(_totals)
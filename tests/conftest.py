@@ -0,0 +1,28 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "src"))
+# Keep module-level caches away from the user's real cache
+os.environ.setdefault("VD_CACHE_DIR", tempfile.mkdtemp(prefix="vd-test-cache-"))
+os.environ.setdefault("VD_ARCHIVE_DIR", tempfile.mkdtemp(prefix="vd-test-archive-"))
+
+
+@pytest.fixture
+def assert_bands_close():
+    """
+    Compares Bollinger bands as (mean, variance): rounding differences live in the
+    variance, and the square root blows them up where a window barely moves (pandas
+    itself reports a std of ~1e-7 for twenty identical closes).
+    """
+    def check(upper, lower, expected_upper, expected_lower, price: float, rtol: float):
+        upper, lower = np.asarray(upper), np.asarray(lower)
+        expected_upper, expected_lower = np.asarray(expected_upper), np.asarray(expected_lower)
+        np.testing.assert_allclose((upper + lower) / 2, (expected_upper + expected_lower) / 2, rtol=rtol)
+        np.testing.assert_allclose(((upper - lower) / 4) ** 2, ((expected_upper - expected_lower) / 4) ** 2,
+                                   rtol=rtol, atol=1e-12 * price ** 2)
+    return check
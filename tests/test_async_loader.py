@@ -0,0 +1,23 @@
+import asyncio
+
+import pytest
+
+import upstream
+from async_loader import AsyncStockDataLoader
+from scheduler import BULK, INTERACTIVE, current_priority, priority
+
+
+async def _run_in_worker(func):
+    return await AsyncStockDataLoader()._call(func)
+
+
+@pytest.mark.parametrize("level", [INTERACTIVE, BULK])
+def test_workers_run_at_the_callers_priority(level):
+    with priority(level):
+        assert asyncio.run(_run_in_worker(current_priority)) == level
+
+
+def test_workers_count_towards_the_callers_counter():
+    with upstream.tracking(upstream.CallCounter()) as counter:
+        asyncio.run(_run_in_worker(lambda: upstream.record("info")))
+    assert counter.counts["info"] == 1
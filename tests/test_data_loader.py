@@ -0,0 +1,21 @@
+import data_loader
+from data_loader import StockDataLoader
+
+
+class CountingLimiter:
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+
+
+def test_bulk_limiter_leaves_room_for_page_loads():
+    assert data_loader.bulk_rate_limiter.rate < data_loader.scheduler.rate
+
+
+def test_cached_info_takes_no_token():
+    data_loader.disk_cache.set_json("info", {"longName": "Cached Inc"}, ticker="CACHED")
+    limiter = CountingLimiter()
+    assert StockDataLoader.fetch_info("CACHED", stale_ok=False, _limiter=limiter) == {"longName": "Cached Inc"}
+    assert limiter.acquired == 0
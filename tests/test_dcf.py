@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+import analysis
+
+INPUTS = dict(free_cash_flow=1.2e9, years=5, shares_outstanding=3.5e8, net_debt=4e8)
+
+
+def test_grid_cells_equal_the_scalar_dcf_exactly():
+    growth = np.array([-0.05, 0.0, 0.04, 0.1, 0.25])
+    discount = np.array([0.06, 0.08, 0.093, 0.12])
+    grid = analysis.calculate_dcf_grid(growth_rate=growth[None, :], terminal_growth_rate=0.025,
+                                       discount_rate=discount[:, None], **INPUTS)
+    assert grid["fair_value"].shape == (4, 5)
+    assert grid["fcf"].shape == (4, 5, 5)
+
+    for i, r in enumerate(discount):
+        for j, g in enumerate(growth):
+            scalar = analysis.calculate_dcf(growth_rate=g, terminal_growth_rate=0.025, discount_rate=r, **INPUTS)
+            for key in ("fair_value", "enterprise_value", "equity_value", "terminal_value", "pv_terminal_value"):
+                assert grid[key][i, j] == scalar[key], key
+            assert list(grid["fcf"][i, j]) == [p["FCF"] for p in scalar["projections"]]
+            assert list(grid["pv"][i, j]) == [p["PV"] for p in scalar["projections"]]
+
+
+def test_constant_growth_path_equals_growth_rate():
+    by_rate = analysis.calculate_dcf_grid(growth_rate=0.07, terminal_growth_rate=0.02, discount_rate=0.09, **INPUTS)
+    by_path = analysis.calculate_dcf_grid(growth_rate=None, growth_path=[0.07] * 5, terminal_growth_rate=0.02,
+                                          discount_rate=0.09, **INPUTS)
+    assert by_path["fair_value"] == by_rate["fair_value"]
+
+
+def test_growth_path_must_cover_every_year():
+    with pytest.raises(ValueError):
+        analysis.calculate_dcf_grid(growth_rate=None, growth_path=[0.1] * 3, terminal_growth_rate=0.02,
+                                    discount_rate=0.09, **INPUTS)
+
+
+def test_sensitivity_table_matches_the_scalar_dcf():
+    table = analysis.dcf_sensitivity(INPUTS["free_cash_flow"], [0.05, 0.1], [0.08, 0.1], 0.025,
+                                     shares_outstanding=INPUTS["shares_outstanding"], net_debt=INPUTS["net_debt"])
+    for r in table.index:
+        for g in table.columns:
+            scalar = analysis.calculate_dcf(growth_rate=g, terminal_growth_rate=0.025, discount_rate=r, **INPUTS)
+            assert table.loc[r, g] == scalar["fair_value"]
+
+
+def test_simulation_discards_draws_without_a_terminal_value():
+    result = analysis.simulate_dcf(INPUTS["free_cash_flow"], (0.08, 0.03), (0.025, 0.01), (0.04, 0.02),
+                                   n_draws=20_000, shares_outstanding=INPUTS["shares_outstanding"], seed=1)
+    assert 0 < result["valid_draws"] < 20_000
+    assert np.isfinite(result["fair_values"]).all()
+    assert result["percentiles"][5] <= result["percentiles"][50] <= result["percentiles"][95]
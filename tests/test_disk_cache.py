@@ -0,0 +1,144 @@
+import os
+import stat
+import time
+
+import pandas as pd
+import pytest
+
+from disk_cache import EVICT_SCAN_EVERY, STALE_TMP_AGE, DiskCache
+
+
+def _age(cache: DiskCache, dataset: str, ext: str, seconds: float, **params):
+    path = cache._path(cache.make_key(dataset, **params), ext)
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+    return path
+
+
+def test_fresh_stale_and_expired(tmp_path):
+    cache = DiskCache(root=str(tmp_path), ttls={"info": 10}, hard_ttls={"info": 100})
+    cache.set_json("info", {"a": 1}, ticker="AAPL")
+    assert cache.get_json("info", ticker="AAPL") == {"a": 1}
+    assert cache.peek_json("info", ticker="AAPL") == ({"a": 1}, True)
+
+    _age(cache, "info", "json", 50, ticker="AAPL")
+    assert cache.get_json("info", ticker="AAPL") is None
+    assert cache.peek_json("info", ticker="AAPL") == ({"a": 1}, False)
+
+    _age(cache, "info", "json", 200, ticker="AAPL")
+    assert cache.peek_json("info", ticker="AAPL") == (None, False)
+    assert cache.peek_json("info", expired_ok=True, ticker="AAPL") == ({"a": 1}, False)
+
+
+def test_datasets_without_ttl_never_expire(tmp_path):
+    cache = DiskCache(root=str(tmp_path))
+    cache.set_json("history_meta", {"start": None}, ticker="AAPL", interval="1d")
+    _age(cache, "history_meta", "json", 10 * 365 * 24 * 3600, ticker="AAPL", interval="1d")
+    assert cache.get_json("history_meta", ticker="AAPL", interval="1d") == {"start": None}
+
+
+def test_frames_round_trip_and_empty_frames_are_not_stored(tmp_path):
+    cache = DiskCache(root=str(tmp_path))
+    df = pd.DataFrame({"Total Revenue": [1.0, 2.0]}, index=pd.to_datetime(["2023-09-30", "2024-09-30"]))
+    cache.set_frame("financials_annual", df, ticker="AAPL", statement="financials")
+    pd.testing.assert_frame_equal(cache.get_frame("financials_annual", ticker="AAPL", statement="financials"), df)
+
+    cache.set_frame("financials_annual", pd.DataFrame(), ticker="MSFT", statement="financials")
+    assert cache.get_frame("financials_annual", ticker="MSFT", statement="financials") is None
+
+
+def test_keys_depend_on_every_parameter():
+    assert DiskCache.make_key("info", ticker="AAPL") == DiskCache.make_key("info", ticker="AAPL")
+    assert DiskCache.make_key("info", ticker="AAPL") != DiskCache.make_key("info", ticker="MSFT")
+    assert DiskCache.make_key("info", ticker="AAPL") != DiskCache.make_key("resolution", ticker="AAPL")
+
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    cache = DiskCache(root=str(tmp_path))
+    paths = {}
+    for i, symbol in enumerate(["A", "B", "C"]):
+        cache.set_json("info", {"payload": "x" * 1000}, ticker=symbol)
+        path = cache._path(cache.make_key("info", ticker=symbol), "json")
+        # Oldest access first; mtimes stay fresh
+        os.utime(path, (time.time() - 100 + i, time.time()))
+        paths[symbol] = path
+    size = os.path.getsize(paths["A"])
+
+    # Reading A makes B the least recently used
+    assert cache.get_json("info", ticker="A") is not None
+    cache.max_bytes = 3 * size
+    cache.set_json("info", {"payload": "x" * 1000}, ticker="D")
+
+    assert not os.path.exists(paths["B"])
+    assert all(os.path.exists(paths[s]) for s in ("A", "C"))
+    assert cache.get_json("info", ticker="D") is not None
+
+
+def test_writes_leave_no_temp_files_and_use_the_umask_mode(tmp_path):
+    cache = DiskCache(root=str(tmp_path))
+    cache.set_json("info", {"a": 1}, ticker="AAPL")
+    cache.set_frame("history_series", pd.DataFrame({"Close": [1.0]}), ticker="AAPL", interval="1d")
+
+    names = os.listdir(tmp_path)
+    assert len(names) == 2
+    assert not any(n.startswith(".tmp-") for n in names)
+    # The mode a plain open() creates files with
+    probe = tmp_path.parent / f"{tmp_path.name}-probe"
+    probe.write_bytes(b"")
+    for name in names:
+        assert stat.S_IMODE(os.stat(tmp_path / name).st_mode) == stat.S_IMODE(os.stat(probe).st_mode)
+
+
+def test_failed_write_keeps_the_previous_entry(tmp_path):
+    cache = DiskCache(root=str(tmp_path))
+    cache.set_json("info", {"a": 1}, ticker="AAPL")
+    path = cache._path(cache.make_key("info", ticker="AAPL"), "json")
+
+    def failing(f):
+        f.write(b"partial")
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        cache._atomic_write(path, failing)
+    assert cache.get_json("info", ticker="AAPL") == {"a": 1}
+    assert not any(n.startswith(".tmp-") for n in os.listdir(tmp_path))
+
+
+def test_eviction_sweeps_abandoned_temp_files(tmp_path):
+    cache = DiskCache(root=str(tmp_path))
+    old = tmp_path / ".tmp-crashed"
+    recent = tmp_path / ".tmp-in-progress"
+    old.write_bytes(b"x")
+    recent.write_bytes(b"x")
+    then = time.time() - STALE_TMP_AGE - 60
+    os.utime(old, (then, then))
+
+    cache.set_json("info", {"a": 1}, ticker="AAPL")
+
+    assert not old.exists()
+    assert recent.exists()
+
+
+def test_directory_is_only_scanned_when_needed(tmp_path, monkeypatch):
+    cache = DiskCache(root=str(tmp_path), max_bytes=10**6)
+    scans = []
+    evict = cache._evict
+    monkeypatch.setattr(cache, "_evict", lambda: scans.append(1) or evict())
+
+    for i in range(EVICT_SCAN_EVERY + 1):
+        cache.set_json("info", {"a": i}, ticker=f"T{i}")
+    # The first write and every EVICT_SCAN_EVERY-th after it
+    assert len(scans) == 2
+
+    # Going over the budget scans at once
+    cache.max_bytes = 1
+    cache.set_json("info", {"a": 1}, ticker="AAPL")
+    assert len(scans) == 3
+    assert os.listdir(tmp_path) == []
+
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = DiskCache(root=str(tmp_path), enabled=False)
+    cache.set_json("info", {"a": 1}, ticker="AAPL")
+    assert cache.get_json("info", ticker="AAPL") is None
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,267 @@
+import sys
+import time
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from history_store import REFRESH_BACKOFF, HistoryStore, period_start
+from scheduler import RequestScheduler, UpstreamUnavailable
+
+KEY = ("AAPL", "1d")
+
+
+class FakeUpstream:
+    """Bars up to now (daily by default), served like Ticker.history; records each request."""
+
+    def __init__(self, index=None):
+        if index is None:
+            index = pd.bdate_range(end=pd.Timestamp.now(tz="UTC").normalize(), periods=800)
+        close = 100 + np.arange(len(index), dtype=float)
+        self.bars = pd.DataFrame({"Close": close, "Volume": 1.0, "Stock Splits": 0.0}, index=index)
+        self.requests = []
+        self.error = None
+
+    def __call__(self, ticker_symbol, interval, period=None, start=None):
+        self.requests.append({"period": period, "start": start})
+        if self.error is not None:
+            raise self.error
+        if start is not None:
+            return self.bars[self.bars.index >= start].copy()
+        first = period_start(period, pd.Timestamp.now(tz="UTC"))
+        return self.bars.copy() if first is None else self.bars[self.bars.index >= first].copy()
+
+
+@pytest.fixture
+def upstream():
+    return FakeUpstream()
+
+
+@pytest.fixture
+def store(upstream):
+    store = HistoryStore()
+    store._download = upstream
+    return store
+
+
+def _expire(store: HistoryStore, seconds: float):
+    store._entries[KEY]["refreshed"] -= seconds
+
+
+def test_shorter_periods_are_slices_of_the_stored_series(store, upstream):
+    year = store.get("AAPL", "1y")
+    month = store.get("AAPL", "1mo")
+    assert len(upstream.requests) == 1
+    assert month.index[-1] == year.index[-1]
+    assert month.index[0] > year.index[0]
+
+
+def test_longer_period_downloads_and_extends_the_series(store, upstream):
+    store.get("AAPL", "1mo")
+    two_years = store.get("AAPL", "2y")
+    assert [r["period"] for r in upstream.requests] == ["1mo", "2y"]
+    assert two_years.index[0] >= period_start("2y", pd.Timestamp.now(tz="UTC"))
+    assert two_years.index.is_monotonic_increasing and two_years.index.is_unique
+
+
+def test_expired_series_only_fetches_the_tail(store, upstream):
+    store.get("AAPL", "1y")
+    stored_last = store._entries[KEY]["series"].index[-1]
+    _expire(store, 2 * 3600)
+
+    store.get("AAPL", "1y", stale_ok=False)
+
+    tail = upstream.requests[-1]
+    assert tail["period"] is None
+    assert stored_last - pd.Timedelta(days=8) <= tail["start"] < stored_last
+
+
+def test_new_bars_are_merged_after_the_stored_ones(store, upstream):
+    store.get("AAPL", "1y")
+    next_day = upstream.bars.index[-1] + pd.tseries.offsets.BDay()
+    upstream.bars.loc[next_day] = {"Close": 9999.0, "Volume": 1.0, "Stock Splits": 0.0}
+    _expire(store, 2 * 3600)
+
+    history = store.get("AAPL", "1y", stale_ok=False)
+
+    assert history["Close"].iloc[-1] == 9999.0
+    assert history.index.is_unique
+    assert history["Close"].iloc[:-1].equals(upstream.bars["Close"].loc[history.index[:-1]])
+
+
+def test_revised_overlap_triggers_a_full_download(store, upstream):
+    store.get("AAPL", "1y")
+    # A 2:1 split re-adjusts every past close
+    upstream.bars["Close"] /= 2
+    _expire(store, 2 * 3600)
+
+    history = store.get("AAPL", "1y", stale_ok=False)
+
+    assert len(upstream.requests) == 3
+    assert upstream.requests[-1]["start"] == pd.Timestamp(store._entries[KEY]["start"])
+    assert history["Close"].equals(upstream.bars["Close"].loc[history.index])
+
+
+def test_failed_refresh_serves_stored_bars_and_backs_off(store, upstream):
+    before = store.get("AAPL", "1y")
+    _expire(store, 2 * 3600)
+    upstream.error = TimeoutError("timed out")
+
+    assert store.get("AAPL", "1y", stale_ok=False).equals(before)
+    assert store.get("AAPL", "1y", stale_ok=False).equals(before)
+    # The second call fell inside the backoff window and did not retry
+    assert len(upstream.requests) == 2
+
+    store._failed_at[KEY] -= REFRESH_BACKOFF + 1
+    store.get("AAPL", "1y", stale_ok=False)
+    assert len(upstream.requests) == 3
+
+
+def test_failed_refresh_past_the_hard_ttl_raises(store, upstream):
+    store.get("AAPL", "1y")
+    _expire(store, store._hard_ttl("1d") + 3600)
+    upstream.error = TimeoutError("timed out")
+
+    with pytest.raises(TimeoutError):
+        store.get("AAPL", "1y", stale_ok=False)
+
+
+def test_expired_series_is_served_while_upstream_is_down(store, upstream):
+    before = store.get("AAPL", "1y")
+    _expire(store, store._hard_ttl("1d") + 3600)
+    upstream.error = UpstreamUnavailable("circuit open")
+
+    assert store.get("AAPL", "1y", stale_ok=False).equals(before)
+
+
+def test_successful_refresh_clears_the_backoff(store, upstream):
+    store.get("AAPL", "1y")
+    _expire(store, 2 * 3600)
+    upstream.error = TimeoutError("timed out")
+    store.get("AAPL", "1y", stale_ok=False)
+
+    upstream.error = None
+    store._failed_at[KEY] -= REFRESH_BACKOFF + 1
+    store.get("AAPL", "1y", stale_ok=False)
+
+    assert KEY not in store._failed_at
+    assert time.time() - store._entries[KEY]["refreshed"] < 60
+
+
+def test_empty_tail_is_a_failed_refresh(store, upstream):
+    before = store.get("AAPL", "1y")
+    _expire(store, 2 * 3600)
+    refreshed = store._entries[KEY]["refreshed"]
+    upstream.bars = upstream.bars.iloc[:0]
+
+    assert store.get("AAPL", "1y", stale_ok=False).equals(before)
+    assert store._entries[KEY]["refreshed"] == refreshed
+    assert KEY in store._failed_at
+
+
+def _minute_store():
+    now = pd.Timestamp.now(tz="UTC").floor("min")
+    upstream = FakeUpstream(pd.date_range(end=now, periods=10 * 24 * 60, freq="min"))
+    store = HistoryStore()
+    store._download = upstream
+    return store, upstream
+
+
+def test_intraday_series_are_trimmed_to_what_upstream_serves():
+    store, upstream = _minute_store()
+    history = store.get("AAPL", "max", interval="1m")
+    assert history.index[0] >= pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=7)
+    assert len(store._entries[("AAPL", "1m")]["series"]) == len(history)
+
+    # Covered by the trimmed series, so served without another download
+    store.get("AAPL", "5d", interval="1m")
+    assert len(upstream.requests) == 1
+
+
+def test_intraday_gap_longer_than_one_request_is_downloaded_in_full():
+    store, upstream = _minute_store()
+    store.get("AAPL", "5d", interval="1m")
+    entry = store._entries[("AAPL", "1m")]
+    # Last refreshed a week ago
+    entry["series"] = entry["series"].iloc[:10]
+    entry["refreshed"] -= 7 * 24 * 3600
+
+    history = store.get("AAPL", "5d", interval="1m", stale_ok=False)
+
+    assert upstream.requests[-1] == {"period": "7d", "start": None}
+    assert history.index[-1] == upstream.bars.index[-1]
+    assert history.index.is_unique
+
+
+def test_memory_is_bounded_to_max_entries(upstream):
+    store = HistoryStore(max_entries=2)
+    store._download = upstream
+    for symbol in ("A", "B", "C"):
+        store.get(symbol, "1mo")
+    assert list(store._entries) == [("B", "1d"), ("C", "1d")]
+
+
+@pytest.mark.parametrize("period", ["5d", "1mo", "6mo", "1y", "ytd"])
+def test_period_start_covers_the_period(period):
+    now = pd.Timestamp("2026-10-16 15:00", tz="UTC")
+    assert period_start(period, now) < now
+    assert period_start("max", now) is None
+
+
+class HTTPError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status_code = status
+
+
+class YFTickerMissingError(Exception):
+    pass
+
+
+class YFPricesMissingError(YFTickerMissingError):
+    pass
+
+
+class FakeTicker:
+    """Ticker.history's error handling: failures are an empty frame unless raise_errors is set."""
+
+    error = None
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    def history(self, interval="1d", raise_errors=False, **span):
+        FakeTicker.attempts += 1
+        if not raise_errors:
+            return pd.DataFrame()
+        raise self.error
+
+
+@pytest.fixture
+def fake_yfinance(monkeypatch):
+    module = types.ModuleType("yfinance")
+    module.Ticker = FakeTicker
+    FakeTicker.attempts = 0
+    monkeypatch.setitem(sys.modules, "yfinance", module)
+    return FakeTicker
+
+
+def test_failed_history_requests_are_retried_and_trip_the_circuit(fake_yfinance):
+    fake_yfinance.error = HTTPError(503)
+    store = HistoryStore(scheduler=RequestScheduler(rate=1000.0, burst=1000, retries=1, base_delay=0.0,
+                                                    failure_threshold=2, reset_after=60.0))
+    with pytest.raises(HTTPError):
+        store.get("AAPL", "1y")
+    assert fake_yfinance.attempts == 2
+    with pytest.raises(UpstreamUnavailable):
+        store.get("AAPL", "1y")
+    assert fake_yfinance.attempts == 2
+
+
+def test_symbol_without_prices_is_empty_not_a_failure(fake_yfinance):
+    fake_yfinance.error = YFPricesMissingError("NOPE: possibly delisted; no price data found")
+    store = HistoryStore(scheduler=RequestScheduler(retries=1, base_delay=0.0, failure_threshold=1))
+    assert store.get("NOPE", "1d").empty
+    assert fake_yfinance.attempts == 1
+    assert store.scheduler.state == "closed"
@@ -0,0 +1,41 @@
+"""The vectorized indicator engine against the batch functions in analysis.py."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import analysis
+import indicator_engine
+
+
+def _close_matrix() -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    index = pd.bdate_range("2020-01-01", periods=400)
+    values = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (len(index), 4)), axis=0))
+    closes = pd.DataFrame(values, index=index, columns=["A", "B", "C", "D"])
+    closes.iloc[:50, 1] = np.nan  # listed later
+    closes.iloc[[100, 101, 250], 2] = np.nan  # missing bars
+    closes.iloc[300:340, 3] = closes.iloc[299, 3]  # halted
+    return closes
+
+
+def test_vectorized_engine_matches_batch_functions(assert_bands_close):
+    closes = _close_matrix()
+    results = indicator_engine.compute_indicators(closes)
+    for ticker in closes.columns:
+        data = closes[[ticker]].rename(columns={ticker: "Close"})
+        expected = {
+            "sma": analysis.calculate_sma(data),
+            "ema": analysis.calculate_ema(data),
+            "rsi": analysis.calculate_rsi(data),
+        }
+        for name, series in expected.items():
+            np.testing.assert_allclose(results[name][ticker].to_numpy(), series.to_numpy(),
+                                       rtol=1e-9, atol=1e-9, err_msg=f"{name} {ticker}")
+        upper, lower = analysis.calculate_bollinger_bands(data)
+        assert_bands_close(results["bb_upper"][ticker], results["bb_lower"][ticker], upper, lower,
+                           data["Close"].max(), rtol=1e-9)
+
+
+def test_vectorized_engine_rejects_unknown_indicators():
+    with pytest.raises(ValueError):
+        indicator_engine.compute_indicators(_close_matrix(), indicators=("sma", "macd"))
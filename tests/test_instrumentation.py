@@ -0,0 +1,46 @@
+import pytest
+
+import instrumentation
+
+
+class StopException(Exception):
+    """Stands in for the exception st.stop() raises."""
+
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr(instrumentation, "ENABLED", True)
+    monkeypatch.setattr(instrumentation, "TRACE_FILE", None)
+    yield
+    instrumentation.end_rerun()
+
+
+def test_stopped_rerun_is_still_ended():
+    with pytest.raises(StopException):
+        with instrumentation.rerun_scope():
+            rerun = instrumentation.current()
+            raise StopException()
+    assert instrumentation.current() is None
+    assert [s["name"] for s in rerun.spans] == ["rerun"]
+
+
+def test_scope_inside_a_rerun_is_a_span():
+    rerun = instrumentation.begin_rerun()
+
+    @instrumentation.rerun_scope("fragment.valuation")
+    def fragment():
+        return instrumentation.current()
+
+    assert fragment() is rerun
+    assert instrumentation.current() is rerun
+    assert [s["name"] for s in rerun.spans] == ["fragment.valuation"]
+
+
+def test_scope_on_its_own_is_a_rerun():
+    @instrumentation.rerun_scope("fragment.valuation")
+    def fragment():
+        return instrumentation.current()
+
+    rerun = fragment()
+    assert rerun.label == "fragment.valuation"
+    assert instrumentation.current() is None
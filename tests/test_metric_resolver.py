@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+
+import analysis
+from metric_resolver import METRIC_ALIASES, ColumnResolver, resolve_column
+
+
+@pytest.mark.parametrize("columns, metric, expected", [
+    (["Cost Of Revenue", "Operating Revenue"], "revenue", "Operating Revenue"),
+    (["Cost Of Revenue", "Gross Profit"], "revenue", None),
+    (["Net Income Discontinuous Operations", "Net Income Common Stockholders"], "net_income",
+     "Net Income Common Stockholders"),
+    (["Net Income Discontinuous Operations"], "net_income", None),
+    (["Other Receivables"], "receivables", None),
+    (["EBITDA"], "ebit", None),
+    (["total  revenue", "Revenue"], "revenue", "total  revenue"),
+])
+def test_only_listed_aliases_match(columns, metric, expected):
+    assert resolve_column(columns, metric) == expected
+
+
+def test_first_alias_wins_regardless_of_column_order():
+    columns = ["Revenue", "Operating Revenue", "Total Revenue"]
+    for order in (columns, columns[::-1]):
+        assert ColumnResolver(order).resolve("revenue") == "Total Revenue"
+    assert ColumnResolver(columns).candidates("revenue") == ("Total Revenue", "Revenue", "Operating Revenue")
+
+
+def test_every_alias_resolves_to_itself():
+    for metric, aliases in METRIC_ALIASES.items():
+        for alias in aliases:
+            assert alias in ColumnResolver([alias]).candidates(metric)
+
+
+def test_panel_falls_back_to_other_aliases_only():
+    index = pd.MultiIndex.from_tuples([("A", pd.Timestamp("2024-12-31")), ("B", pd.Timestamp("2024-12-31"))],
+                                      names=["Ticker", "Date"])
+    financials = pd.DataFrame({
+        "Total Revenue": [100.0, None],
+        "Operating Revenue": [None, 200.0],
+        "Cost Of Revenue": [60.0, 500.0],
+        "Net Income": [10.0, None],
+        "Net Income Discontinuous Operations": [None, 40.0],
+        "Gross Profit": [40.0, 50.0],
+    }, index=index)
+    empty = pd.DataFrame(index=index)
+
+    tidy = analysis.calculate_fundamental_metrics_panel(financials, empty, empty)
+    values = tidy.set_index(["Ticker", "Metric"])["Value"]
+
+    assert values[("A", "Gross Margin %")] == 40.0
+    assert values[("B", "Gross Margin %")] == 25.0  # Operating Revenue, not Cost Of Revenue
+    assert values[("A", "Net Margin %")] == 10.0
+    assert ("B", "Net Margin %") not in values.index
@@ -0,0 +1,35 @@
+import prewarm
+import upstream
+from data_loader import StockDataLoader
+
+
+def test_report_counts_resolver_probes_and_retries(monkeypatch):
+    def resolve(symbol):
+        # Two exchange probes before the listing is found
+        upstream.record("info")
+        upstream.record("info")
+        return f"{symbol}.ST"
+
+    def warm(symbol, period, limiter):
+        with upstream.tracking(upstream.CallCounter()) as calls:
+            # One dataset, fetched on the second attempt
+            upstream.record("history")
+            upstream.record("history")
+        return {"upstream_requests": calls.total, "failed": []}
+
+    monkeypatch.setattr(StockDataLoader, "resolve_ticker", staticmethod(resolve))
+    monkeypatch.setattr(StockDataLoader, "warm", staticmethod(warm))
+    report = prewarm.prewarm(["VOLV-B", "ERIC-B"], workers=2, rate=1000.0)
+    assert report["upstream_requests"] == 8
+    assert report["failed"] == {}
+
+
+def test_unresolved_ticker_still_reports_its_probes(monkeypatch):
+    def resolve(symbol):
+        upstream.record("info")
+        return None
+
+    monkeypatch.setattr(StockDataLoader, "resolve_ticker", staticmethod(resolve))
+    report = prewarm.prewarm(["NOPE"], workers=1, rate=1000.0)
+    assert report["upstream_requests"] == 1
+    assert report["failed"] == {"NOPE": ["resolution"]}
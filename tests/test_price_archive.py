@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_loader
+from history_store import HistoryStore
+from price_archive import PriceArchive
+
+
+@pytest.fixture
+def minute_bars(tmp_path, monkeypatch):
+    """Twenty days of minute bars: the last seven upstream, the rest only in the archive."""
+    now = pd.Timestamp.now(tz="UTC").floor("min")
+    index = pd.date_range(end=now, periods=20 * 24 * 60, freq="min", tz="UTC").tz_convert("America/New_York")
+    close = 100 + np.arange(len(index), dtype=float) / 1e4
+    bars = pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1.0}, index=index)
+
+    served = bars[bars.index >= now - pd.Timedelta(days=7)]
+    store = HistoryStore()
+    store._download = lambda ticker_symbol, interval, period=None, start=None: (
+        served[served.index >= start] if start is not None else served)
+    archive = PriceArchive(root=str(tmp_path))
+    archive.append("AAPL", "1m", bars[bars.index < now - pd.Timedelta(days=5)])
+    monkeypatch.setattr(data_loader, "history_store", store)
+    monkeypatch.setattr(data_loader, "price_archive", archive)
+    return bars
+
+
+def test_long_intraday_period_starts_with_archived_bars(minute_bars):
+    # Nothing archived for this symbol: only what upstream serves
+    history = data_loader.StockDataLoader.fetch_history("MSFT", "1mo", "1m")
+    assert history.index[0] >= minute_bars.index[-1] - pd.Timedelta(days=7)
+
+    history = data_loader.StockDataLoader.fetch_history("AAPL", "1mo", "1m")
+    assert history.index.is_unique and history.index.is_monotonic_increasing
+    assert history.index[0] == minute_bars.index[0]
+    assert history.index[-1] == minute_bars.index[-1]
+    assert len(history) == len(minute_bars)
+
+
+def test_periods_upstream_serves_skip_the_archive(minute_bars):
+    history = data_loader.StockDataLoader.fetch_history("AAPL", "5d", "1m")
+    assert history.index[0] >= minute_bars.index[-1] - pd.Timedelta(days=7)
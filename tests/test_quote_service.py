@@ -0,0 +1,38 @@
+import time
+
+import pytest
+
+from quote_service import QuoteService
+
+
+class FakeFetch:
+    def __init__(self, quotes):
+        self.quotes = quotes
+        self.requests = []
+
+    def __call__(self, symbols):
+        self.requests.append(list(symbols))
+        return {s: self.quotes[s] for s in symbols if s in self.quotes}
+
+
+def test_misses_are_not_refetched_within_the_ttl():
+    fetch = FakeFetch({})
+    service = QuoteService(fetch, interval=60.0, miss_ttl=0.1)
+    for _ in range(3):
+        with pytest.raises(KeyError):
+            service.get("DELISTED")
+    assert fetch.requests == [["DELISTED"]]
+
+    time.sleep(0.15)
+    fetch.quotes["DELISTED"] = {"last_price": 10.0, "previous_close": 9.0}
+    assert service.get("DELISTED")["last_price"] == 10.0
+    assert len(fetch.requests) == 2
+
+
+def test_quotes_are_served_from_the_table():
+    fetch = FakeFetch({"AAPL": {"last_price": 101.0, "previous_close": 100.0}})
+    service = QuoteService(fetch, interval=60.0)
+    first = service.get("AAPL")
+    assert service.get("AAPL") == first
+    assert fetch.requests == [["AAPL"]]
+    assert 0 <= service.age("AAPL") < 1
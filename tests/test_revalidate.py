@@ -0,0 +1,62 @@
+import threading
+import time
+
+from revalidate import Revalidator
+from scheduler import BACKGROUND, current_priority
+
+
+def _drain(revalidator: Revalidator, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while revalidator.pending() and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert revalidator.pending() == 0
+
+
+def test_one_refresh_per_key():
+    revalidator = Revalidator(max_concurrent=2)
+    release = threading.Event()
+    runs = []
+
+    def refresh():
+        runs.append(1)
+        release.wait(5)
+
+    assert revalidator.submit(("statement", "AAPL"), refresh)
+    assert not revalidator.submit(("statement", "AAPL"), refresh)
+    assert revalidator.submit(("statement", "MSFT"), refresh)
+    release.set()
+    _drain(revalidator)
+
+    assert len(runs) == 2
+    assert revalidator.stats() == {"scheduled": 2, "skipped": 1, "refreshed": 2, "failed": 0}
+    # Once finished, the key can be refreshed again
+    assert revalidator.submit(("statement", "AAPL"), refresh)
+    _drain(revalidator)
+
+
+def test_backlog_is_capped():
+    revalidator = Revalidator(max_concurrent=1, max_pending=2)
+    release = threading.Event()
+    scheduled = [revalidator.submit(("info", str(i)), lambda: release.wait(5)) for i in range(4)]
+    release.set()
+    _drain(revalidator)
+    assert scheduled == [True, True, False, False]
+
+
+def test_failures_are_counted_and_contained():
+    revalidator = Revalidator()
+
+    def failing():
+        raise TimeoutError("timed out")
+
+    assert revalidator.submit(("info", "AAPL"), failing)
+    _drain(revalidator)
+    assert revalidator.stats()["failed"] == 1
+
+
+def test_refreshes_run_at_background_priority():
+    revalidator = Revalidator()
+    seen = []
+    revalidator.submit(("info", "AAPL"), lambda: seen.append(current_priority()))
+    _drain(revalidator)
+    assert seen == [BACKGROUND]
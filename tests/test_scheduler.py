@@ -0,0 +1,178 @@
+import threading
+import time
+
+import pytest
+
+from rate_limit import with_retry
+from scheduler import (BACKGROUND, BULK, INTERACTIVE, RequestScheduler, UpstreamUnavailable, current_priority,
+                       is_transient, priority)
+
+
+class HTTPError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status_code = status
+
+
+def _fail(exc):
+    def func():
+        raise exc
+    return func
+
+
+def _scheduler(**kwargs) -> RequestScheduler:
+    options = dict(rate=1000.0, burst=1000, retries=0, base_delay=0.0, failure_threshold=2, reset_after=0.1)
+    options.update(kwargs)
+    return RequestScheduler(**options)
+
+
+@pytest.mark.parametrize("exc, transient", [
+    (HTTPError(429), True),
+    (HTTPError(503), True),
+    (HTTPError(404), False),
+    (TimeoutError(), True),
+    (ConnectionError(), True),
+    (Exception("Too Many Requests. Rate limited. Try after a while."), True),
+    (ValueError("no data"), False),
+])
+def test_is_transient(exc, transient):
+    assert is_transient(exc) is transient
+
+
+def test_priority_is_thread_local_and_nests():
+    assert current_priority() == INTERACTIVE
+    with priority(BULK):
+        assert current_priority() == BULK
+        with priority(BACKGROUND):
+            assert current_priority() == BACKGROUND
+        seen = []
+        worker = threading.Thread(target=lambda: seen.append(current_priority()))
+        worker.start()
+        worker.join()
+        assert seen == [INTERACTIVE]
+        assert current_priority() == BULK
+    assert current_priority() == INTERACTIVE
+
+
+def test_transient_errors_are_retried():
+    scheduler = _scheduler(retries=2, failure_threshold=10)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise HTTPError(429)
+        return "ok"
+
+    assert scheduler.call("info", flaky) == "ok"
+    assert len(attempts) == 3
+
+
+def test_other_errors_are_raised_at_once_and_do_not_trip_the_circuit():
+    scheduler = _scheduler(retries=3)
+    attempts = []
+
+    def missing():
+        attempts.append(1)
+        raise ValueError("unknown symbol")
+
+    for _ in range(5):
+        with pytest.raises(ValueError):
+            scheduler.call("info", missing)
+    assert len(attempts) == 5
+    assert scheduler.state == "closed"
+
+
+def test_circuit_opens_fails_fast_and_recovers():
+    scheduler = _scheduler()
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            scheduler.call("history", _fail(TimeoutError()))
+    assert scheduler.state == "open"
+
+    sent = []
+    with pytest.raises(UpstreamUnavailable):
+        scheduler.call("history", lambda: sent.append(1))
+    assert sent == []
+
+    time.sleep(scheduler.reset_after + 0.05)
+    assert scheduler.call("history", lambda: "ok") == "ok"
+    assert scheduler.state == "closed"
+
+
+def test_failed_trial_reopens_the_circuit():
+    scheduler = _scheduler()
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            scheduler.call("history", _fail(TimeoutError()))
+    time.sleep(scheduler.reset_after + 0.05)
+
+    with pytest.raises(TimeoutError):
+        scheduler.call("history", _fail(TimeoutError()))
+    assert scheduler.state == "open"
+    with pytest.raises(UpstreamUnavailable):
+        scheduler.call("history", lambda: "ok")
+
+
+def test_only_one_trial_request_while_half_open():
+    scheduler = _scheduler()
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            scheduler.call("history", _fail(TimeoutError()))
+    time.sleep(scheduler.reset_after + 0.05)
+
+    started, release = threading.Event(), threading.Event()
+
+    def trial():
+        started.set()
+        release.wait(5)
+        return "ok"
+
+    worker = threading.Thread(target=scheduler.call, args=("history", trial))
+    worker.start()
+    assert started.wait(5)
+    with pytest.raises(UpstreamUnavailable):
+        scheduler.call("history", lambda: "ok")
+    release.set()
+    worker.join()
+    assert scheduler.state == "closed"
+
+
+def test_interactive_request_overtakes_queued_bulk_requests():
+    scheduler = _scheduler(rate=50.0, burst=1, failure_threshold=100)
+    scheduler.call("history", lambda: None)  # use up the burst
+    order = []
+    lock = threading.Lock()
+
+    def request(label, level):
+        def func():
+            with lock:
+                order.append(label)
+        scheduler.call("history", func, level=level)
+
+    bulk = [threading.Thread(target=request, args=(f"bulk{i}", BULK)) for i in range(10)]
+    for thread in bulk:
+        thread.start()
+    while len(scheduler._waiting) < len(bulk):
+        time.sleep(0.001)
+    interactive = threading.Thread(target=request, args=("interactive", INTERACTIVE))
+    interactive.start()
+    for thread in bulk + [interactive]:
+        thread.join(5)
+
+    # At most the bulk request already at the head of the line goes first
+    assert order.index("interactive") <= 1
+    stats = scheduler.stats()["classes"]
+    assert stats["bulk"]["requests"] == 10 and stats["interactive"]["requests"] == 2
+
+
+def test_with_retry_gives_up_after_the_last_attempt():
+    attempts = []
+
+    def failing():
+        attempts.append(1)
+        raise TimeoutError()
+
+    with pytest.raises(TimeoutError):
+        with_retry(failing, retries=2, base_delay=0.0)
+    assert len(attempts) == 3
@@ -0,0 +1,60 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return object()
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(flights.do, ("history", "AAPL"), fetch) for _ in range(8)]
+        # Let every caller join the flight before the leader finishes
+        while sum(flights.coalesced.values()) < 7:
+            threading.Event().wait(0.001)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert flights.stats() == {"history": {"issued": 1, "coalesced": 7}}
+
+
+def test_error_is_shared_and_the_key_is_released():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flights.do, ("info", "AAPL"), failing)
+        while not flights._calls:
+            threading.Event().wait(0.001)
+        follower = pool.submit(flights.do, ("info", "AAPL"), failing)
+        while not flights.coalesced["info"]:
+            threading.Event().wait(0.001)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+
+    # A later call starts a new flight
+    assert flights.do(("info", "AAPL"), lambda: 42) == 42
+
+
+def test_different_keys_do_not_coalesce():
+    flights = SingleFlight()
+    assert flights.do(("info", "AAPL"), lambda: 1) == 1
+    assert flights.do(("info", "MSFT"), lambda: 2) == 2
+    assert flights.stats() == {"info": {"issued": 2, "coalesced": 0}}
@@ -0,0 +1,31 @@
+import pandas as pd
+
+import statement_views
+from financial_definitions import INCOME_STATEMENT_STRUCTURE
+
+
+def _statement(revenue: float) -> pd.DataFrame:
+    index = pd.to_datetime(["2023-09-30", "2024-09-30"])
+    return pd.DataFrame({"Total Revenue": [revenue, revenue * 2], "Net Income": [1e6, 2e6]}, index=index)
+
+
+def test_views_follow_refreshed_statements(monkeypatch):
+    fetched = {"df": _statement(1e8)}
+    monkeypatch.setattr(statement_views, "STATEMENTS", [
+        ("Income Statement", lambda ticker, quarterly: fetched["df"], INCOME_STATEMENT_STRUCTURE),
+    ])
+
+    first = statement_views.statement_views("AAPL")["Income Statement"]
+    fetched["df"] = _statement(3e8)
+    second = statement_views.statement_views("AAPL")["Income Statement"]
+
+    assert first["absolute"].loc["Total Revenue"].tolist() == [100.0, 200.0]
+    assert second["absolute"].loc["Total Revenue"].tolist() == [300.0, 600.0]
+    assert second["style"].loc["Total Revenue"].tolist() == [statement_views.BOLD] * 2
+
+
+def test_empty_statement_has_no_view(monkeypatch):
+    monkeypatch.setattr(statement_views, "STATEMENTS", [
+        ("Income Statement", lambda ticker, quarterly: pd.DataFrame(), INCOME_STATEMENT_STRUCTURE),
+    ])
+    assert statement_views.statement_views("AAPL") == {"Income Statement": None}
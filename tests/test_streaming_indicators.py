@@ -0,0 +1,65 @@
+"""Streaming indicators against the batch functions in analysis.py."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import analysis
+from streaming_indicators import StreamingBollinger, StreamingEMA, StreamingRSI, StreamingSMA, _Streaming, _Windowed
+
+
+def _closes(seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    walk = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 300)))
+    # A halted stretch of identical closes and a few repeated ticks
+    walk[120:150] = walk[119]
+    walk[200:203] = walk[199]
+    return pd.DataFrame({"Close": walk}, index=pd.bdate_range("2024-01-01", periods=len(walk)))
+
+
+def _stream(indicator, data: pd.DataFrame) -> list:
+    return [indicator.update(float(v)) for v in data["Close"]]
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("streaming, batch", [
+    (StreamingSMA, analysis.calculate_sma),
+    (StreamingEMA, analysis.calculate_ema),
+    (StreamingRSI, analysis.calculate_rsi),
+])
+def test_streaming_matches_batch_exactly(seed, streaming, batch):
+    data = _closes(seed)
+    expected = batch(data, 14).to_numpy()
+    np.testing.assert_array_equal(np.array(_stream(streaming(14), data)), expected)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_streaming_bollinger_matches_within_tolerance(seed, assert_bands_close):
+    data = _closes(seed)
+    upper, lower = analysis.calculate_bollinger_bands(data, 20)
+    values = np.array(_stream(StreamingBollinger(20), data))
+    assert_bands_close(values[:, 0], values[:, 1], upper, lower, data["Close"].max(), rtol=1e-12)
+
+
+@pytest.mark.parametrize("streaming", [StreamingSMA, StreamingEMA, StreamingRSI, StreamingBollinger])
+def test_revise_replaces_the_last_close(streaming):
+    data = _closes()
+    closes = data["Close"].to_list()
+    revised = streaming(14).seed(data.iloc[:-1])
+    revised.update(closes[-1] * 1.05)
+    revised.update(closes[-1] * 0.97)
+    value = revised.revise(closes[-1])
+
+    reference = streaming(14).seed(data.iloc[:-1])
+    reference.update(closes[-1] * 1.05)
+    assert value == reference.update(closes[-1])
+
+
+def test_indicators_must_implement_the_hooks():
+    class Incomplete(_Windowed):
+        def _step(self, value, evicted):
+            return value
+
+    with pytest.raises(TypeError):
+        Incomplete(5)
+    with pytest.raises(TypeError):
+        _Streaming()
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+
+import upstream
+from disk_cache import DiskCache
+from scheduler import BULK, INTERACTIVE, UpstreamUnavailable, current_priority, priority
+import data_loader
+from ticker_resolver import ResolutionUncertain, TickerResolver, candidates
+
+
+class Probe:
+    """Answers from a set of listed symbols; records every probe."""
+
+    def __init__(self, listed=(), errors=None, delays=None):
+        self.listed = set(listed)
+        self.errors = errors or {}
+        self.delays = delays or {}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, symbol):
+        with self._lock:
+            self.calls.append((symbol, current_priority()))
+        upstream.record("history")
+        time.sleep(self.delays.get(symbol, 0))
+        if symbol in self.errors:
+            raise self.errors[symbol]
+        return symbol in self.listed
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskCache(root=str(tmp_path))
+
+
+def test_candidates_follow_exchange_priority():
+    assert candidates("VOLV-B") == ["VOLV-B", "VOLV-B.ST", "VOLV-B.CO"]
+
+
+def test_first_listing_in_priority_order_wins(cache):
+    # The US listing answers last but still takes priority over .ST
+    probe = Probe(listed={"ABC", "ABC.ST"}, delays={"ABC": 0.1})
+    assert TickerResolver(probe, cache).resolve("ABC") == "ABC"
+
+
+def test_probes_run_concurrently(cache):
+    probe = Probe(listed={"ABC.CO"}, delays={"ABC": 0.2, "ABC.ST": 0.2, "ABC.CO": 0.2})
+    start = time.monotonic()
+    assert TickerResolver(probe, cache).resolve("ABC") == "ABC.CO"
+    assert time.monotonic() - start < 0.5
+
+
+def test_hits_and_misses_are_cached(cache):
+    probe = Probe(listed={"NOVO-B.CO"})
+    resolver = TickerResolver(probe, cache)
+    assert resolver.resolve("NOVO-B") == "NOVO-B.CO"
+    assert resolver.resolve("NOPE") is None
+    calls = len(probe.calls)
+
+    assert resolver.resolve("NOVO-B") == "NOVO-B.CO"
+    assert resolver.resolve("NOPE") is None
+    assert len(probe.calls) == calls
+
+
+@pytest.mark.parametrize("error", [TimeoutError("timed out"), UpstreamUnavailable("circuit open")])
+def test_failed_probes_are_not_cached_as_a_miss(cache, error):
+    probe = Probe(errors={"ABC": error, "ABC.ST": error, "ABC.CO": error})
+    resolver = TickerResolver(probe, cache)
+    with pytest.raises(ResolutionUncertain) as raised:
+        resolver.resolve("ABC")
+    assert raised.value.resolved is None
+
+    probe.errors = {}
+    probe.listed = {"ABC.ST"}
+    assert resolver.resolve("ABC") == "ABC.ST"
+
+
+def test_hit_behind_a_failed_probe_is_not_cached(cache):
+    probe = Probe(listed={"ABC.ST"}, errors={"ABC": TimeoutError("timed out")})
+    resolver = TickerResolver(probe, cache)
+    with pytest.raises(ResolutionUncertain) as raised:
+        resolver.resolve("ABC")
+    assert raised.value.resolved == "ABC.ST"
+
+    # Once the US probe answers it wins, so the earlier answer must not have been remembered
+    probe.errors = {}
+    probe.listed = {"ABC", "ABC.ST"}
+    assert resolver.resolve("ABC") == "ABC"
+
+
+def test_probes_count_towards_the_callers_counter(cache):
+    resolver = TickerResolver(Probe(), cache)
+    with upstream.tracking(upstream.CallCounter()) as counter:
+        resolver.resolve("ABC")
+    assert counter.counts["history"] == 3
+
+
+@pytest.mark.parametrize("level", [INTERACTIVE, BULK])
+def test_probes_run_at_the_callers_priority(cache, level):
+    probe = Probe()
+    with priority(level):
+        TickerResolver(probe, cache).resolve("ABC")
+    assert [p for _, p in probe.calls] == [level] * 3
+
+
+def test_loader_answers_but_does_not_cache_uncertain_resolutions(cache, monkeypatch):
+    probe = Probe(listed={"UNCERTAIN.ST"}, errors={"UNCERTAIN": TimeoutError("timed out")})
+    monkeypatch.setattr(data_loader, "ticker_resolver", TickerResolver(probe, cache))
+    assert data_loader.StockDataLoader.resolve_ticker("UNCERTAIN") == "UNCERTAIN.ST"
+
+    probe.errors = {}
+    probe.listed = {"UNCERTAIN", "UNCERTAIN.ST"}
+    assert data_loader.StockDataLoader.resolve_ticker("UNCERTAIN") == "UNCERTAIN"
+    # Certain answers are cached as before
+    calls = len(probe.calls)
+    assert data_loader.StockDataLoader.resolve_ticker("UNCERTAIN") == "UNCERTAIN"
+    assert len(probe.calls) == calls